@@ -66,6 +66,7 @@ Examples:
     # Update command
     update_parser = subparsers.add_parser('update', help='Update a library in the database')
     update_parser.add_argument('library', help='Library name to update')
+    update_parser.add_argument('--force', action='store_true', help='Re-extract every version, even ones that are unchanged since the last analysis')
     
     args = parser.parse_args()
     
@@ -144,7 +145,7 @@ Examples:
         
         elif args.command == 'update':
             print(f"🔄 Updating library: {args.library}")
-            signatures = creator.update_library(args.library)
+            signatures = creator.update_library(args.library, force=args.force)
             
             if signatures:
                 print(f"✅ Successfully updated {args.library}")
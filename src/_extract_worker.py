@@ -0,0 +1,40 @@
+"""
+Signature extraction worker
+Imports a library from a pip --target directory in a fresh interpreter and
+writes its pickled signatures to stdout
+
+Usage: python _extract_worker.py <target_dir> [deps_dir] <library_name>
+"""
+
+import importlib
+import os
+import pickle
+import sys
+
+# sys.path[0] is this script's directory, so the extractor imports as a top-level module
+from signature_extractor import SignatureExtractor
+
+
+def main() -> int:
+    target_dir, *deps_dirs, library_name = sys.argv[1:]
+    
+    # Keep the real stdout for the result and point fd 1 at stderr, so
+    # anything the library prints while importing can't corrupt the pickle
+    result_out = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    
+    # Replace the script directory so our own modules can't shadow the library's;
+    # dependencies come after the package's own install
+    sys.path[0:1] = [target_dir, *deps_dirs]
+    
+    module = importlib.import_module(library_name)
+    signatures = SignatureExtractor().extract_all_signatures(module)
+    
+    result_out.write(pickle.dumps(signatures, protocol=pickle.HIGHEST_PROTOCOL))
+    result_out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
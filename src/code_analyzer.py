@@ -1,12 +1,52 @@
 import ast
+import hashlib
+import logging
 import os
-from typing import Dict, List, Set, Any
-from collections import defaultdict
+import pickle
+import sys
+import tempfile
+import threading
+import tokenize
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Set, Any, Tuple, Optional
+
+
+log = logging.getLogger("requirements_creator")
+
+
+# Token types that make up a string literal (f-strings are split into pieces from 3.12 on)
+STRING_TOKENS = frozenset(
+    getattr(tokenize, name) for name in ("STRING", "FSTRING_START", "FSTRING_MIDDLE", "FSTRING_END")
+    if hasattr(tokenize, name)
+)
+
+# Below this many files the process pool start-up costs more than it saves
+PARALLEL_MIN_FILES = 8
+
+# In-memory LRU of extraction results keyed by a digest of the source bytes,
+# so identical sources (repeated snippets, vendored copies) are parsed once
+PARSE_CACHE_SIZE = 512
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+# Directories that never contain code worth analyzing
+SKIP_DIRS = frozenset({'.git', '__pycache__', 'venv', 'env', '.venv', 'node_modules'})
+
+# Bump when the cached call format changes so stale entries are ignored
+AST_CACHE_VERSION = 3
+
+# Upper bound on on-disk AST cache entries; the least recently used go first
+AST_CACHE_MAX_ENTRIES = 5000
 
 
 class FunctionCall:
     """Represents a function call found in code"""
     
+    # One instance per call site, so skip the per-instance __dict__
+    __slots__ = ('function_name', 'module_name', 'arguments', 'line_number')
+    
     def __init__(self, function_name: str, module_name: str, arguments: Set[str], line_number: int):
         self.function_name = function_name
         self.module_name = module_name
@@ -17,104 +57,265 @@ class FunctionCall:
         return f"FunctionCall({self.module_name}.{self.function_name}, args={self.arguments})"
 
 
-class ImportVisitor(ast.NodeVisitor):
-    """AST visitor to extract import statements"""
-    
-    def __init__(self):
-        self.imports = {}  # alias -> full_name
-        self.from_imports = {}  # alias -> (module, name)
-    
-    def visit_Import(self, node):
-        for alias in node.names:
-            self.imports[alias.asname or alias.name] = alias.name
-        self.generic_visit(node)
+def _resolve_name_call(node: ast.Name, imports: Dict[str, str], from_imports: Dict[str, tuple]) -> tuple:
+    """Resolve a direct function call (e.g., func())"""
+    func_name = node.id
+    # Check if it's from an import
+    if func_name in imports:
+        return func_name, imports[func_name]
+    elif func_name in from_imports:
+        module, name = from_imports[func_name]
+        return name, module
+    else:
+        # Could be built-in or local function
+        return func_name, None
+
+
+def _resolve_attribute_call(node: ast.Attribute, imports: Dict[str, str], from_imports: Dict[str, tuple]) -> tuple:
+    """Resolve an attribute call (e.g., module.func())"""
+    if type(node.value) is ast.Name:
+        # Check if the base is an import
+        base_name = node.value.id
+        attr_name = node.attr
+        
+        if base_name in imports:
+            return attr_name, imports[base_name]
+        elif base_name in from_imports:
+            module, name = from_imports[base_name]
+            return attr_name, module
+        else:
+            # Could be a module import
+            return attr_name, base_name
     
-    def visit_ImportFrom(self, node):
-        module_name = node.module or ""
-        for alias in node.names:
-            full_name = f"{module_name}.{alias.name}" if module_name else alias.name
-            self.from_imports[alias.asname or alias.name] = (module_name, alias.name)
-        self.generic_visit(node)
+    return None, None
+
+
+# AST node classes are never subclassed, so an exact type lookup replaces isinstance chains
+_CALL_RESOLVERS = {
+    ast.Name: _resolve_name_call,
+    ast.Attribute: _resolve_attribute_call,
+}
+
+
+def resolve_function_call(node, imports: Dict[str, str], from_imports: Dict[str, tuple]) -> tuple:
+    """Resolve function name and module from the func node of a call"""
+    resolver = _CALL_RESOLVERS.get(type(node))
+    if resolver is None:
+        return None, None
+    return resolver(node, imports, from_imports)
+
+
+def extract_arguments(node: ast.Call) -> Set[str]:
+    """Extract keyword argument names from a call (positional names can't be known)"""
+    return {kw.arg for kw in node.keywords if kw.arg}
 
 
-class FunctionCallVisitor(ast.NodeVisitor):
-    """AST visitor to extract function calls"""
+def extract_imports_and_calls(tree: ast.AST) -> Tuple[Dict[str, str], Dict[str, tuple], List[FunctionCall]]:
+    """Collect imports and library function calls in a single pass over the tree"""
+    imports = {}  # alias -> full_name
+    from_imports = {}  # alias -> (module, name)
+    call_nodes = []
     
-    def __init__(self, imports: Dict[str, str], from_imports: Dict[str, tuple]):
-        self.imports = imports
-        self.from_imports = from_imports
-        self.calls = []
-        self.current_imports = set()
+    for node in ast.walk(tree):
+        node_type = type(node)
+        if node_type is ast.Call:
+            call_nodes.append(node)
+        elif node_type is ast.Import:
+            for alias in node.names:
+                imports[alias.asname or alias.name] = alias.name
+        elif node_type is ast.ImportFrom:
+            module_name = node.module or ""
+            for alias in node.names:
+                from_imports[alias.asname or alias.name] = (module_name, alias.name)
     
-    def visit_Call(self, node):
-        # Extract function name and arguments
-        func_name, module_name = self.resolve_function_call(node.func)
-        
+    # Resolve after the walk so every import is known, whatever its position
+    calls = []
+    resolvers = _CALL_RESOLVERS
+    for node in call_nodes:
+        resolver = resolvers.get(type(node.func))
+        if resolver is None:
+            continue
+        func_name, module_name = resolver(node.func, imports, from_imports)
         if func_name and module_name:
-            arguments = self.extract_arguments(node)
-            call = FunctionCall(
-                function_name=func_name,
-                module_name=module_name,
-                arguments=arguments,
+            # Names repeat across thousands of call sites; share one string object each
+            calls.append(FunctionCall(
+                function_name=sys.intern(func_name),
+                module_name=sys.intern(module_name),
+                arguments=extract_arguments(node),
                 line_number=getattr(node, 'lineno', 0)
-            )
-            self.calls.append(call)
-        
-        self.generic_visit(node)
+            ))
     
-    def resolve_function_call(self, node) -> tuple:
-        """Resolve function name and module from AST node"""
-        if isinstance(node, ast.Name):
-            # Direct function call (e.g., func())
-            func_name = node.id
-            # Check if it's from an import
-            if func_name in self.imports:
-                return func_name, self.imports[func_name]
-            elif func_name in self.from_imports:
-                module, name = self.from_imports[func_name]
-                return name, module
-            else:
-                # Could be built-in or local function
-                return func_name, None
-        
-        elif isinstance(node, ast.Attribute):
-            # Attribute access (e.g., module.func())
-            if isinstance(node.value, ast.Name):
-                # Check if the base is an import
-                base_name = node.value.id
-                attr_name = node.attr
-                
-                if base_name in self.imports:
-                    return attr_name, self.imports[base_name]
-                elif base_name in self.from_imports:
-                    module, name = self.from_imports[base_name]
-                    return attr_name, module
+    return imports, from_imports, calls
+
+
+def parse_source(source, filename: str = "<unknown>") -> ast.Module:
+    """Parse source into a module AST (single entry point for the parser backend)"""
+    return ast.parse(source, filename=filename, mode='exec', type_comments=False)
+
+
+def _cache_entry_path(cache_dir: str, file_path: str) -> str:
+    """Location of the cached calls for a source file"""
+    digest = hashlib.blake2b(os.path.abspath(file_path).encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, digest + ".pkl")
+
+
+def _load_cached_calls(cache_file: str, key: str) -> Optional[List[FunctionCall]]:
+    """Return cached calls if the entry exists and its key still matches"""
+    try:
+        with open(cache_file, 'rb') as f:
+            cached_key, calls = pickle.load(f)
+    except Exception:
+        return None
+    if cached_key != key:
+        return None
+    # Mark the entry as recently used so pruning keeps it
+    try:
+        os.utime(cache_file)
+    except OSError:
+        pass
+    return calls
+
+
+def _store_cached_calls(cache_file: str, key: str, calls: List[FunctionCall]) -> None:
+    """Atomically write calls to the cache (failures only cost a re-parse next time)"""
+    try:
+        cache_dir = os.path.dirname(cache_file)
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((key, calls), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_file)
+    except Exception:
+        pass
+
+
+def prune_ast_cache(cache_dir: str, max_entries: int = AST_CACHE_MAX_ENTRIES) -> None:
+    """Delete the least recently used cache entries beyond max_entries"""
+    try:
+        with os.scandir(cache_dir) as entries:
+            cached = [(entry.stat().st_mtime, entry.path) for entry in entries if entry.name.endswith(".pkl")]
+    except OSError:
+        return
+    if len(cached) <= max_entries:
+        return
+    
+    cached.sort()
+    for _, path in cached[:len(cached) - max_entries]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _read_import_prefix(f) -> str:
+    """Read lines up to the first top-level statement that isn't an import or docstring"""
+    lines = []
+    
+    def readline() -> str:
+        line = f.readline()
+        lines.append(line)
+        return line
+    
+    # Tokens take care of brackets, continuations, comments and every string form,
+    # and the tokenizer only reads as far as the statement it stops at
+    statement = None  # "import" or "string" while inside an accepted statement
+    complete = 0  # lines covered by the accepted statements
+    try:
+        for token in tokenize.generate_tokens(readline):
+            if token.type in (tokenize.NL, tokenize.COMMENT):
+                continue
+            if token.type == tokenize.ENDMARKER:
+                complete = len(lines)
+                break
+            if token.type == tokenize.NEWLINE:
+                complete = token.end[0]
+                statement = None
+            elif statement is None:
+                if token.type == tokenize.NAME and token.string in ('import', 'from'):
+                    statement = "import"
+                elif token.type in STRING_TOKENS:
+                    statement = "string"
                 else:
-                    # Could be a module import
-                    return attr_name, base_name
-        
-        return None, None
+                    break
+            elif statement == "string" and token.type not in STRING_TOKENS:
+                # An expression that merely starts with a string
+                break
+    except (tokenize.TokenError, SyntaxError):
+        pass
     
-    def extract_arguments(self, node) -> Set[str]:
-        """Extract argument names from function call"""
-        arguments = set()
-        
-        # Positional arguments (we can't easily determine names)
-        # So we'll focus on keyword arguments
-        
-        # Keyword arguments
-        for kw in node.keywords:
-            if kw.arg:
-                arguments.add(kw.arg)
+    return ''.join(lines[:complete])
+
+
+def extract_imports_only(file_path: str) -> Tuple[Dict[str, str], Dict[str, tuple]]:
+    """Extract imports from the leading import block of a file (imports further down are missed)"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            prefix = _read_import_prefix(f)
+        imports, from_imports, _ = extract_imports_and_calls(parse_source(prefix, file_path))
+        return imports, from_imports
+    except Exception as e:
+        log.warning(f"⚠️  Error parsing {file_path}: {e}")
+        return {}, {}
+
+
+def _parse_and_extract(source, filename: str) -> Tuple[Dict[str, str], Dict[str, tuple], List[FunctionCall]]:
+    """Parse source and extract imports and calls, reusing results for identical content"""
+    digest = hashlib.blake2b(source, digest_size=16).digest()
+    with _parse_cache_lock:
+        cached = _parse_cache.get(digest)
+        if cached is not None:
+            _parse_cache.move_to_end(digest)
+            return cached
+    
+    result = extract_imports_and_calls(parse_source(source, filename))
+    
+    with _parse_cache_lock:
+        _parse_cache[digest] = result
+        if len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return result
+
+
+def _parse_file(file_path: str) -> Tuple[Dict[str, str], Dict[str, tuple], List[FunctionCall]]:
+    """Parse a file from its raw bytes (ast.parse detects the encoding itself)"""
+    with open(file_path, 'rb') as f:
+        return _parse_and_extract(f.read(), file_path)
+
+
+def analyze_file(file_path: str, cache_dir: Optional[str] = None) -> Tuple[str, List[FunctionCall]]:
+    """Analyze a single Python file (module-level so worker processes can pickle it)"""
+    cache_file = key = None
+    if cache_dir:
+        try:
+            stat = os.stat(file_path)
+            key = f"{AST_CACHE_VERSION}-{stat.st_mtime_ns}-{stat.st_size}"
+            cache_file = _cache_entry_path(cache_dir, file_path)
+            calls = _load_cached_calls(cache_file, key)
+            if calls is not None:
+                return file_path, calls
+        except OSError:
+            cache_file = None
+    
+    try:
+        _, _, calls = _parse_file(file_path)
         
-        return arguments
+    except Exception as e:
+        log.warning(f"⚠️  Error parsing {file_path}: {e}")
+        return file_path, []
+    
+    if cache_file:
+        _store_cached_calls(cache_file, key, calls)
+    
+    return file_path, calls
 
 
 class CodeAnalyzer:
     """Analyze Python code to extract function calls"""
     
-    def __init__(self):
-        self.import_patterns = {
+    def __init__(self, cache_dir: Optional[str] = None, import_patterns: Optional[Dict[str, List[str]]] = None):
+        # Directory for per-file parse results keyed on mtime/size (None disables caching)
+        self.cache_dir = cache_dir
+        self.import_patterns = import_patterns or {
             "pandas": ["pandas", "pd"],
             "numpy": ["numpy", "np"],
             "matplotlib": ["matplotlib", "plt", "mpl"],
@@ -166,70 +367,113 @@ class CodeAnalyzer:
             "websockets": ["websockets"],
             "sqlite3": ["sqlite3"]
         }
+        # Reverse index: top-level import name -> library
+        self._pattern_to_lib = {
+            pattern: library
+            for library, patterns in self.import_patterns.items()
+            for pattern in patterns
+        }
+        # Deepest dotted pattern (e.g. "google.cloud" is depth 2); bounds prefix lookups
+        self._max_pattern_depth = max(pattern.count('.') + 1 for pattern in self._pattern_to_lib)
     
-    def analyze_codebase(self, code_path: str) -> Dict[str, Dict[str, Any]]:
+    def analyze_codebase(self, code_path: str, imports_only: bool = False) -> Dict[str, Dict[str, Any]]:
         """Analyze entire codebase and extract function calls by library"""
-        function_calls_by_library = defaultdict(lambda: defaultdict(lambda: {"arguments": set(), "calls": []}))
+        files = self.get_python_files(code_path)
         
-        for file_path in self.get_python_files(code_path):
-            try:
-                file_calls = self.analyze_file(file_path)
-                for call in file_calls:
-                    library_name = self.resolve_library_name(call.module_name)
-                    if library_name:
-                        function_calls_by_library[library_name][call.function_name]["arguments"].update(call.arguments)
-                        function_calls_by_library[library_name][call.function_name]["calls"].append(call)
-            except Exception as e:
-                print(f"⚠️  Error analyzing {file_path}: {e}")
+        if imports_only:
+            return self._analyze_imports(files)
         
-        # Convert sets to lists for JSON serialization
+        calls_by_function = {}
+        for file_path, file_calls in self._map_files(files):
+            self._accumulate_calls(file_calls, calls_by_function)
+        
+        # Entries are keyed by path, so files that were moved or deleted would pile up
+        if self.cache_dir:
+            prune_ast_cache(self.cache_dir)
+        
+        return self._group_by_library(calls_by_function)
+    
+    def _accumulate_calls(self, calls: List[FunctionCall], acc: Dict[tuple, list]) -> None:
+        """Merge calls into acc, keyed by (library, function) -> [argument set, call count]"""
+        for call in calls:
+            library_name = self.resolve_library_name(call.module_name)
+            if library_name:
+                key = (library_name, call.function_name)
+                record = acc.get(key)
+                if record is None:
+                    acc[key] = [set(call.arguments), 1]
+                else:
+                    record[0].update(call.arguments)
+                    record[1] += 1
+    
+    def _group_by_library(self, acc: Dict[tuple, list]) -> Dict[str, Dict[str, Any]]:
+        """Nest accumulated calls by library (lists instead of sets for JSON serialization)"""
+        result = {}
+        for (library, func_name), (arguments, count) in acc.items():
+            result.setdefault(library, {})[func_name] = {
+                "arguments": list(arguments),
+                "calls": count
+            }
+        return result
+    
+    def _analyze_imports(self, files: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Find imported libraries only, without function call details"""
         result = {}
-        for library, functions in function_calls_by_library.items():
-            result[library] = {}
-            for func_name, func_data in functions.items():
-                result[library][func_name] = {
-                    "arguments": list(func_data["arguments"]),
-                    "calls": len(func_data["calls"])
-                }
+        
+        for file_path in files:
+            imports, from_imports = self.extract_imports_only(file_path)
+            modules = list(imports.values()) + [module for module, _ in from_imports.values()]
+            for module_name in modules:
+                library_name = self.resolve_library_name(module_name)
+                if library_name:
+                    result.setdefault(library_name, {})
         
         return result
     
+    def extract_imports_only(self, file_path: str) -> Tuple[Dict[str, str], Dict[str, tuple]]:
+        """Extract imports from the leading import block of a file, skipping the rest of it"""
+        return extract_imports_only(file_path)
+    
     def analyze_file(self, file_path: str) -> List[FunctionCall]:
         """Analyze a single Python file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            tree = ast.parse(content)
-            
-            # Extract imports
-            import_visitor = ImportVisitor()
-            import_visitor.visit(tree)
-            
-            # Extract function calls
-            call_visitor = FunctionCallVisitor(import_visitor.imports, import_visitor.from_imports)
-            call_visitor.visit(tree)
-            
-            return call_visitor.calls
-            
-        except Exception as e:
-            print(f"⚠️  Error parsing {file_path}: {e}")
-            return []
+        return analyze_file(file_path, self.cache_dir)[1]
+    
+    def _map_files(self, files: List[str]):
+        """Run analyze_file over files, in worker processes when there are enough of them"""
+        if len(files) < PARALLEL_MIN_FILES:
+            return map(partial(analyze_file, cache_dir=self.cache_dir), files)
+        
+        workers = os.cpu_count() or 1
+        # Large chunks amortize the pickling cost of shipping results back
+        chunksize = max(1, len(files) // (4 * workers))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_worker_init,
+            initargs=(self.cache_dir, self.import_patterns)
+        ) as executor:
+            return list(executor.map(_worker_task, files, chunksize=chunksize))
     
     def get_python_files(self, path: str) -> List[str]:
         """Get all Python files in a directory recursively"""
         python_files = []
         
-        if os.path.isfile(path) and path.endswith('.py'):
-            return [path]
+        if os.path.isfile(path):
+            return [path] if path.endswith('.py') else []
         
-        for root, dirs, files in os.walk(path):
-            # Skip common directories that shouldn't be analyzed
-            dirs[:] = [d for d in dirs if d not in ['.git', '__pycache__', 'venv', 'env', '.venv', 'node_modules']]
-            
-            for file in files:
-                if file.endswith('.py'):
-                    python_files.append(os.path.join(root, file))
+        # Iterative scandir walk; DirEntry caches the file type so no extra stat per entry
+        stack = [path]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Skip common directories that shouldn't be analyzed
+                            if entry.name not in SKIP_DIRS:
+                                stack.append(entry.path)
+                        elif entry.name.endswith('.py'):
+                            python_files.append(entry.path)
+            except OSError:
+                continue
         
         return python_files
     
@@ -238,65 +482,58 @@ class CodeAnalyzer:
         if not module_name:
             return None
         
-        # Direct mapping
-        for library, patterns in self.import_patterns.items():
-            if module_name in patterns:
-                return library
-        
-        # Handle submodules
-        for library, patterns in self.import_patterns.items():
-            for pattern in patterns:
-                if module_name.startswith(pattern + '.'):
-                    return library
-        
-        return None
+        # Exact match, otherwise the longest dotted prefix that is a known pattern
+        library = self._pattern_to_lib.get(module_name)
+        if library is None and '.' in module_name:
+            parts = module_name.split('.', self._max_pattern_depth)[:self._max_pattern_depth]
+            for depth in range(len(parts), 0, -1):
+                library = self._pattern_to_lib.get('.'.join(parts[:depth]))
+                if library is not None:
+                    break
+        return library
     
     def analyze_code_string(self, code_string: str) -> Dict[str, Dict[str, Any]]:
         """Analyze code from a string and extract function calls by library"""
-        function_calls_by_library = defaultdict(lambda: defaultdict(lambda: {"arguments": set(), "calls": []}))
-        
         try:
-            tree = ast.parse(code_string)
-            
-            # Extract imports
-            import_visitor = ImportVisitor()
-            import_visitor.visit(tree)
-            
-            # Extract function calls
-            call_visitor = FunctionCallVisitor(import_visitor.imports, import_visitor.from_imports)
-            call_visitor.visit(tree)
+            imports, from_imports, calls = _parse_and_extract(code_string.encode('utf-8'), "<string>")
             
             # Process function calls
-            for call in call_visitor.calls:
-                library_name = self.resolve_library_name(call.module_name)
-                if library_name:
-                    function_calls_by_library[library_name][call.function_name]["arguments"].update(call.arguments)
-                    function_calls_by_library[library_name][call.function_name]["calls"].append(call)
+            calls_by_function = {}
+            self._accumulate_calls(calls, calls_by_function)
+            result = self._group_by_library(calls_by_function)
             
             # Also include imported libraries that don't have function calls
             # This ensures they get added to the database for version matching
-            for alias, full_name in import_visitor.imports.items():
+            for alias, full_name in imports.items():
                 library_name = self.resolve_library_name(full_name)
-                if library_name and library_name not in function_calls_by_library:
-                    function_calls_by_library[library_name] = {}
+                if library_name and library_name not in result:
+                    result[library_name] = {}
             
-            for alias, (module, name) in import_visitor.from_imports.items():
+            for alias, (module, name) in from_imports.items():
                 library_name = self.resolve_library_name(module)
-                if library_name and library_name not in function_calls_by_library:
-                    function_calls_by_library[library_name] = {}
-            
-            # Convert sets to lists for JSON serialization
-            result = {}
-            for library, functions in function_calls_by_library.items():
-                result[library] = {}
-                for func_name, func_data in functions.items():
-                    result[library][func_name] = {
-                        "arguments": list(func_data["arguments"]),
-                        "calls": len(func_data["calls"])
-                    }
+                if library_name and library_name not in result:
+                    result[library_name] = {}
             
             return result
             
         except Exception as e:
-            print(f"⚠️  Error parsing code string: {e}")
-            return {} 
\ No newline at end of file
+            log.warning(f"⚠️  Error parsing code string: {e}")
+            return {} 
+
+
+# Per-process analyzer for ProcessPoolExecutor workers, built once by _worker_init
+_worker_analyzer = None
+
+
+def _worker_init(cache_dir: Optional[str], import_patterns: Dict[str, List[str]]) -> None:
+    """Build the worker's CodeAnalyzer once instead of per task"""
+    global _worker_analyzer
+    _worker_analyzer = CodeAnalyzer(cache_dir, import_patterns)
+
+
+def _worker_task(file_path: str) -> Tuple[str, List[FunctionCall]]:
+    """Analyze a file in a worker, returning only calls into known libraries"""
+    file_path, calls = analyze_file(file_path, _worker_analyzer.cache_dir)
+    # Dropping unresolvable calls here keeps them out of the result pickle
+    resolve = _worker_analyzer.resolve_library_name
+    return file_path, [call for call in calls if resolve(call.module_name)]
\ No newline at end of file
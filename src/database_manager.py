@@ -1,7 +1,78 @@
-import json
+import logging
+import orjson
 import os
+import sqlite3
+import sys
+import threading
+import zstandard
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+
+log = logging.getLogger("requirements_creator")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS libraries (
+    name TEXT PRIMARY KEY,
+    analysis_date TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    library TEXT NOT NULL,
+    version TEXT NOT NULL,
+    hash TEXT,
+    PRIMARY KEY (library, version)
+);
+CREATE TABLE IF NOT EXISTS functions (
+    library TEXT NOT NULL,
+    version TEXT NOT NULL,
+    name TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    parameters BLOB,
+    accepts_kwargs INTEGER,
+    PRIMARY KEY (library, version, name)
+);
+CREATE INDEX IF NOT EXISTS functions_by_name ON functions (library, name);
+"""
+
+# Bumped whenever existing databases need migrating (stored in PRAGMA user_version)
+SCHEMA_VERSION = 2
+
+# Stay well under SQLite's bound-parameter limit for IN (...) lookups
+QUERY_CHUNK_SIZE = 500
+
+# Signature blobs at least this large are stored zstd-compressed; smaller ones
+# (most plain functions) are left as JSON since framing would outweigh the gain
+ZSTD_MIN_SIZE = 256
+ZSTD_LEVEL = 3
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def encode_signature(func_sig: Any, compressor: zstandard.ZstdCompressor) -> bytes:
+    """Serialize one signature entry for storage"""
+    data = orjson.dumps(func_sig, default=str, option=orjson.OPT_NON_STR_KEYS)
+    if len(data) >= ZSTD_MIN_SIZE:
+        return compressor.compress(data)
+    return data
+
+
+def decode_signature(blob: bytes, decompressor: zstandard.ZstdDecompressor) -> Any:
+    """Deserialize a stored signature entry (JSON never starts with the zstd magic)"""
+    if blob[:4] == ZSTD_MAGIC:
+        blob = decompressor.decompress(blob)
+    return orjson.loads(blob)
+
+
+def signature_parameters(func_sig: Any) -> Tuple[bytes, int]:
+    """Parameter names (as JSON) and **kwargs flag stored alongside a signature for matching"""
+    if not isinstance(func_sig, dict):
+        return orjson.dumps([]), 0
+    # Older records carry an explicit "parameters" list; newer ones only required/optional
+    params = func_sig.get("parameters")
+    if params is None:
+        params = [*func_sig.get("required_params", []), *func_sig.get("optional_params", [])]
+    params = list(params)
+    return orjson.dumps(params), int("kwargs" in params)
 
 
 class SignatureDBManager:
@@ -10,78 +81,219 @@ class SignatureDBManager:
     def __init__(self, db_path: str = "signature_database"):
         self.db_path = db_path
         os.makedirs(db_path, exist_ok=True)
+        
+        self.db_file = os.path.join(db_path, "signatures.db")
+        # One connection is shared by every thread (the Flask app serves requests on
+        # threads), so all use of it, and each transaction as a whole, holds this lock
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        
+        self.import_legacy_json()
+    
+    def _migrate(self) -> None:
+        """Bring a database written by an older schema up to SCHEMA_VERSION"""
+        with self._lock:
+            (user_version,) = self.conn.execute("PRAGMA user_version").fetchone()
+            if user_version >= SCHEMA_VERSION:
+                return
+            
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(functions)")}
+            version_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(versions)")}
+            with self.conn:
+                if "hash" not in version_columns:
+                    self.conn.execute("ALTER TABLE versions ADD COLUMN hash TEXT")
+                if "parameters" not in columns:
+                    self.conn.execute("ALTER TABLE functions ADD COLUMN parameters BLOB")
+                    self.conn.execute("ALTER TABLE functions ADD COLUMN accepts_kwargs INTEGER")
+                    
+                    # Backfill the matching columns from the stored signatures
+                    decompressor = zstandard.ZstdDecompressor()
+                    rows = [
+                        (*signature_parameters(decode_signature(signature, decompressor)), rowid)
+                        for rowid, signature in self.conn.execute("SELECT rowid, signature FROM functions")
+                    ]
+                    self.conn.executemany(
+                        "UPDATE functions SET parameters = ?, accepts_kwargs = ? WHERE rowid = ?", rows
+                    )
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     
-    def save_library_signatures(self, library_name: str, signatures: Dict[str, Any]) -> str:
-        """Save library signatures to JSON file"""
-        file_path = os.path.join(self.db_path, f"{library_name}_signatures.json")
+    def import_legacy_json(self) -> list:
+        """Import *_signatures.json files that are not in the database yet"""
+        imported = []
         
-        # Create comprehensive signature data
-        signature_data = {
-            "library_name": library_name,
-            "analysis_date": datetime.now().isoformat(),
-            "total_versions": len(signatures),
-            "versions": signatures
-        }
+        for filename in sorted(os.listdir(self.db_path)):
+            if not filename.endswith('_signatures.json'):
+                continue
+            
+            library_name = filename.replace('_signatures.json', '')
+            if self.library_exists(library_name):
+                continue
+            
+            file_path = os.path.join(self.db_path, filename)
+            try:
+                with open(file_path, 'rb') as f:
+                    data = orjson.loads(f.read())
+                self._write_library(library_name, data.get("versions", {}), data.get("analysis_date"))
+                imported.append(library_name)
+            except Exception as e:
+                log.error(f"❌ Failed to import {file_path}: {e}")
+        
+        return imported
+    
+    def _write_library(self, library_name: str, signatures: Dict[str, Any], analysis_date: Optional[str] = None, replace: bool = True,
+                       hashes: Optional[Dict[str, str]] = None, keep_versions: Iterable[str] = ()) -> None:
+        """Write a library's signatures in one transaction (replace=False, or keep_versions, preserves stored versions)"""
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        hashes = hashes or {}
+        keep_versions = [ver for ver in keep_versions if ver not in signatures]
+        version_rows = [(library_name, ver) for ver in signatures]
+        function_rows = [
+            (library_name, ver, func_name, encode_signature(func_sig, compressor), *signature_parameters(func_sig))
+            for ver, version_sigs in signatures.items()
+            for func_name, func_sig in version_sigs.items()
+        ]
         
+        with self._lock, self.conn:
+            if replace:
+                keep_clause = f" AND version NOT IN ({', '.join('?' * len(keep_versions))})" if keep_versions else ""
+                self.conn.execute(f"DELETE FROM functions WHERE library = ?{keep_clause}", (library_name, *keep_versions))
+                self.conn.execute(f"DELETE FROM versions WHERE library = ?{keep_clause}", (library_name, *keep_versions))
+            else:
+                self.conn.executemany("DELETE FROM functions WHERE library = ? AND version = ?", version_rows)
+                self.conn.executemany("DELETE FROM versions WHERE library = ? AND version = ?", version_rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO libraries (name, analysis_date) VALUES (?, ?)",
+                (library_name, analysis_date or datetime.now().isoformat())
+            )
+            self.conn.executemany(
+                "INSERT INTO versions (library, version, hash) VALUES (?, ?, ?)",
+                [(library_name, ver, hashes.get(ver)) for ver in signatures]
+            )
+            self.conn.executemany(
+                "INSERT INTO functions (library, version, name, signature, parameters, accepts_kwargs) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                function_rows
+            )
+    
+    def save_library_signatures(self, library_name: str, signatures: Dict[str, Any], hashes: Optional[Dict[str, str]] = None,
+                                keep_versions: Iterable[str] = ()) -> str:
+        """Save library signatures to the database (keep_versions are left as stored instead of being dropped)"""
         try:
-            with open(file_path, 'w') as f:
-                json.dump(signature_data, f, indent=2, default=str)
-            
-            print(f"💾 Saved signatures to {file_path}")
-            return file_path
+            self._write_library(library_name, signatures, hashes=hashes, keep_versions=keep_versions)
+            log.info(f"💾 Saved signatures for {library_name} to {self.db_file}")
+            return self.db_file
             
         except Exception as e:
-            print(f"❌ Failed to save signatures for {library_name}: {e}")
+            log.error(f"❌ Failed to save signatures for {library_name}: {e}")
             return None
     
     def load_library_signatures(self, library_name: str) -> Optional[Dict[str, Any]]:
-        """Load library signatures from file"""
-        file_path = os.path.join(self.db_path, f"{library_name}_signatures.json")
-        
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                return data
-            except Exception as e:
-                print(f"❌ Failed to load signatures for {library_name}: {e}")
-                return None
-        else:
+        """Load library signatures from the database"""
+        try:
+            # Read in one locked snapshot; decoding happens after the lock is released
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT analysis_date FROM libraries WHERE name = ?", (library_name,)
+                ).fetchone()
+                if row is None:
+                    return None
+                
+                version_rows = self.conn.execute(
+                    "SELECT version FROM versions WHERE library = ? ORDER BY rowid", (library_name,)
+                ).fetchall()
+                function_rows = self.conn.execute(
+                    "SELECT version, name, signature FROM functions WHERE library = ? ORDER BY rowid",
+                    (library_name,)
+                ).fetchall()
+            
+            versions = {ver: {} for (ver,) in version_rows}
+            decompressor = zstandard.ZstdDecompressor()
+            for ver, func_name, signature in function_rows:
+                versions.setdefault(ver, {})[func_name] = decode_signature(signature, decompressor)
+            
+            return {
+                "library_name": library_name,
+                "analysis_date": row[0],
+                "total_versions": len(versions),
+                "versions": versions
+            }
+        except Exception as e:
+            log.error(f"❌ Failed to load signatures for {library_name}: {e}")
             return None
     
+    def load_version_signatures(self, library_name: str, versions: Iterable[str]) -> Dict[str, Any]:
+        """Load the stored signatures of only the given versions"""
+        versions = list(versions)
+        loaded = {}
+        decompressor = zstandard.ZstdDecompressor()
+        for start in range(0, len(versions), QUERY_CHUNK_SIZE):
+            chunk = versions[start:start + QUERY_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT version, name, signature FROM functions "
+                    f"WHERE library = ? AND version IN ({placeholders}) ORDER BY rowid",
+                    (library_name, *chunk)
+                ).fetchall()
+            for ver, func_name, signature in rows:
+                loaded.setdefault(ver, {})[func_name] = decode_signature(signature, decompressor)
+        return loaded
+    
+    def get_version_hashes(self, library_name: str) -> Dict[str, str]:
+        """Release hashes of all stored versions of a library that have one"""
+        with self._lock:
+            return dict(self.conn.execute(
+                "SELECT version, hash FROM versions WHERE library = ? AND hash IS NOT NULL", (library_name,)
+            ).fetchall())
+    
+    def list_versions(self, library_name: str) -> Optional[List[str]]:
+        """List a library's stored versions in insertion order (None if the library is unknown)"""
+        with self._lock:
+            if not self.library_exists(library_name):
+                return None
+            rows = self.conn.execute(
+                "SELECT version FROM versions WHERE library = ? ORDER BY rowid", (library_name,)
+            ).fetchall()
+        return [ver for (ver,) in rows]
+    
+    def iter_function_parameters(self, library_name: str, func_names: Iterable[str]):
+        """Yield (version, func_name, parameter set, accepts **kwargs) for the named functions only"""
+        func_names = list(func_names)
+        for start in range(0, len(func_names), QUERY_CHUNK_SIZE):
+            chunk = func_names[start:start + QUERY_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            # Fetch each chunk fully under the lock rather than holding it across yields
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT version, name, parameters, accepts_kwargs FROM functions "
+                    f"WHERE library = ? AND name IN ({placeholders})",
+                    (library_name, *chunk)
+                ).fetchall()
+            for ver, func_name, params, accepts_kwargs in rows:
+                yield ver, func_name, frozenset(map(sys.intern, orjson.loads(params))), bool(accepts_kwargs)
+    
     def library_exists(self, library_name: str) -> bool:
         """Check if library signatures exist in database"""
-        file_path = os.path.join(self.db_path, f"{library_name}_signatures.json")
-        return os.path.exists(file_path)
+        with self._lock:
+            row = self.conn.execute("SELECT 1 FROM libraries WHERE name = ? LIMIT 1", (library_name,)).fetchone()
+        return row is not None
     
     def list_analyzed_libraries(self) -> list:
         """List all libraries that have been analyzed"""
-        libraries = []
-        
-        if not os.path.exists(self.db_path):
-            return libraries
-        
-        for filename in os.listdir(self.db_path):
-            if filename.endswith('_signatures.json'):
-                library_name = filename.replace('_signatures.json', '')
-                libraries.append(library_name)
-        
-        return sorted(libraries)
+        with self._lock:
+            rows = self.conn.execute("SELECT name FROM libraries ORDER BY name").fetchall()
+        return [name for (name,) in rows]
     
     def get_database_stats(self) -> Dict[str, Any]:
         """Get statistics about the signature database"""
-        libraries = self.list_analyzed_libraries()
-        
-        total_versions = 0
-        total_functions = 0
-        
-        for library in libraries:
-            data = self.load_library_signatures(library)
-            if data:
-                total_versions += data.get("total_versions", 0)
-                versions = data.get("versions", {})
-                for version_sigs in versions.values():
-                    total_functions += len(version_sigs)
+        with self._lock:
+            libraries = self.list_analyzed_libraries()
+            (total_versions,) = self.conn.execute("SELECT COUNT(*) FROM versions").fetchone()
+            (total_functions,) = self.conn.execute("SELECT COUNT(*) FROM functions").fetchone()
         
         return {
             "total_libraries": len(libraries),
@@ -92,35 +304,51 @@ class SignatureDBManager:
     
     def delete_library_signatures(self, library_name: str) -> bool:
         """Delete library signatures from database"""
-        file_path = os.path.join(self.db_path, f"{library_name}_signatures.json")
+        if not self.library_exists(library_name):
+            log.warning(f"⚠️  No signatures found for {library_name}")
+            return False
         
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                print(f"🗑️  Deleted signatures for {library_name}")
-                return True
-            except Exception as e:
-                print(f"❌ Failed to delete signatures for {library_name}: {e}")
-                return False
-        else:
-            print(f"⚠️  No signatures found for {library_name}")
+        try:
+            with self._lock, self.conn:
+                self.conn.execute("DELETE FROM functions WHERE library = ?", (library_name,))
+                self.conn.execute("DELETE FROM versions WHERE library = ?", (library_name,))
+                self.conn.execute("DELETE FROM libraries WHERE name = ?", (library_name,))
+            
+            # Drop the legacy JSON too so it is not re-imported on the next start
+            legacy_path = os.path.join(self.db_path, f"{library_name}_signatures.json")
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+            
+            log.info(f"🗑️  Deleted signatures for {library_name}")
+            return True
+        except Exception as e:
+            log.error(f"❌ Failed to delete signatures for {library_name}: {e}")
             return False
     
     def update_library_signatures(self, library_name: str, signatures: Dict[str, Any]) -> str:
-        """Update existing library signatures"""
-        existing_data = self.load_library_signatures(library_name)
-        
-        if existing_data:
-            # Merge with existing data
-            existing_versions = existing_data.get("versions", {})
-            existing_versions.update(signatures)
-            
-            # Update metadata
-            existing_data["analysis_date"] = datetime.now().isoformat()
-            existing_data["total_versions"] = len(existing_versions)
-            existing_data["versions"] = existing_versions
+        """Update existing library signatures (only the given versions are written)"""
+        try:
+            self._write_library(library_name, signatures, replace=False)
+            log.info(f"💾 Updated {len(signatures)} versions of {library_name} in {self.db_file}")
+            return self.db_file
             
-            return self.save_library_signatures(library_name, existing_data["versions"])
-        else:
-            # Create new entry
-            return self.save_library_signatures(library_name, signatures) 
\ No newline at end of file
+        except Exception as e:
+            log.error(f"❌ Failed to update signatures for {library_name}: {e}")
+            return None
+    
+    def dump(self, library_name: str, file_path: Optional[str] = None) -> Optional[str]:
+        """Export a library's signatures to the JSON file format"""
+        data = self.load_library_signatures(library_name)
+        if data is None:
+            log.warning(f"⚠️  No signatures found for {library_name}")
+            return None
+        
+        file_path = file_path or os.path.join(self.db_path, f"{library_name}_signatures.json")
+        try:
+            buf = orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            with open(file_path, 'wb') as f:
+                f.write(buf)
+            return file_path
+        except Exception as e:
+            log.error(f"❌ Failed to export signatures for {library_name}: {e}")
+            return None
@@ -1,40 +1,345 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+import hashlib
+import os
+import sqlite3
 import requests
+import threading
+import httpx
+import logging
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util.retry import Retry
 import json
 from packaging import version
-from typing import List, Dict, Optional
+from packaging.utils import InvalidSdistFilename, InvalidWheelFilename, parse_sdist_filename, parse_wheel_filename
+from typing import List, Dict, Optional, Tuple
 import time
 
 
+log = logging.getLogger("requirements_creator")
+
+
+# Upper bound on in-flight PyPI requests for the async batch helpers
+MAX_CONCURRENT_REQUESTS = 16
+
+# Sustained request rate towards PyPI (bursts up to the same number are allowed)
+MAX_REQUESTS_PER_SECOND = 10
+
+# PEP 691 JSON flavour of the simple repository API
+SIMPLE_JSON_ACCEPT = 'application/vnd.pypi.simple.v1+json'
+
+# On-disk HTTP cache for PyPI JSON responses
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "requirements_creator", "pypi")
+
+# Seconds a cached response is used as is; after that it is revalidated with ETag/Last-Modified
+CACHE_EXPIRE_AFTER = 3600
+
+
+def _release_digests(versions: List[str], files: List[Tuple[str, Optional[str]]]) -> Dict[str, str]:
+    """Map (filename, sha256) pairs to one digest per version: its wheels, or its sdists if it has none"""
+    # Both index formats come through here and only wheels and sdists count, so
+    # either source gives a release the same digest. Filenames carry normalized versions
+    by_normalized = {}
+    for ver in versions:
+        try:
+            by_normalized[str(version.Version(ver))] = ver
+        except version.InvalidVersion:
+            continue
+    
+    files_by_version = {}
+    for filename, digest in files:
+        if not digest:
+            continue
+        try:
+            if filename.endswith(".whl"):
+                file_version, is_wheel = parse_wheel_filename(filename)[1], True
+            else:
+                file_version, is_wheel = parse_sdist_filename(filename)[1], False
+        except (InvalidSdistFilename, InvalidWheelFilename, version.InvalidVersion):
+            # Eggs, installers and other legacy formats
+            continue
+        ver = by_normalized.get(str(file_version))
+        if ver is not None:
+            files_by_version.setdefault(ver, []).append((is_wheel, digest))
+    
+    hashes = {}
+    for ver, release_files in files_by_version.items():
+        digests = [digest for is_wheel, digest in release_files if is_wheel] or [digest for _, digest in release_files]
+        # Any re-uploaded or added file changes the release digest
+        hashes[ver] = hashlib.sha256("".join(sorted(digests)).encode()).hexdigest()
+    return hashes
+
+
+def _parse_simple_index(data: Dict) -> Optional[Tuple[List[str], Dict[str, str]]]:
+    """Versions and release digests from a PEP 691 simple index page (None without a version list)"""
+    versions = data.get("versions")
+    if versions is None:
+        return None
+    
+    versions = list(versions)
+    files = [(file_info["filename"], file_info.get("hashes", {}).get("sha256")) for file_info in data.get("files", ())]
+    return versions, _release_digests(versions, files)
+
+
+def _parse_legacy_releases(data: Dict) -> Tuple[List[str], Dict[str, str]]:
+    """Versions and release digests from a legacy JSON API response"""
+    releases = data["releases"]
+    versions = list(releases)
+    files = [
+        (file_info["filename"], file_info.get("digests", {}).get("sha256"))
+        for release_files in releases.values() for file_info in release_files
+    ]
+    return versions, _release_digests(versions, files)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; callers wait until a token is available"""
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """Take a token (possibly going into debt) and return how long to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+    
+    def acquire(self) -> None:
+        """Block until a token is available"""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+    
+    async def acquire_async(self) -> None:
+        """Wait for a token without blocking the event loop"""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a token before each request that reaches the network"""
+    
+    def __init__(self, rate_limiter: TokenBucket, **kwargs):
+        self.rate_limiter = rate_limiter
+        super().__init__(**kwargs)
+    
+    def send(self, request, **kwargs):
+        # Responses served from the HTTP cache never get here
+        self.rate_limiter.acquire()
+        return super().send(request, **kwargs)
+
+
+class BatchResponseCache:
+    """Conditional-request cache for the httpx batch path, kept in the requests-cache database"""
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batch_responses "
+                "(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_type TEXT, body BLOB, fetched REAL)"
+            )
+    
+    def load(self, urls: List[str]) -> Dict[str, tuple]:
+        """Map each cached URL to (etag, last_modified, content_type, body, fetched)"""
+        entries = {}
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for url, *entry in conn.execute(
+                    "SELECT url, etag, last_modified, content_type, body, fetched FROM batch_responses "
+                    f"WHERE url IN ({placeholders})", chunk
+                ):
+                    entries[url] = tuple(entry)
+        return entries
+    
+    def store(self, entries: Dict[str, tuple]) -> None:
+        """Write (etag, last_modified, content_type, body, fetched) entries in one transaction"""
+        if not entries:
+            return
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO batch_responses VALUES (?, ?, ?, ?, ?, ?)",
+                [(url, *entry) for url, entry in entries.items()]
+            )
+
+
 class PyPIClient:
     """Client for fetching library information from PyPI"""
     
-    def __init__(self):
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH):
         self.base_url = "https://pypi.org/pypi"
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.simple_url = "https://pypi.org/simple"
+        # Expired entries are revalidated with ETag/Last-Modified, so unchanged
+        # projects cost a 304 instead of a full body download
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self.session = CachedSession(
+            cache_path,
+            backend='sqlite',
+            expire_after=CACHE_EXPIRE_AFTER,
+            cache_control=True
+        )
+        # httpx can't use the requests-cache session, so the batch path revalidates
+        # from its own table in the same database
+        self.batch_cache = BatchResponseCache(self.session.cache.db_path)
+        self.rate_limiter = TokenBucket(MAX_REQUESTS_PER_SECOND)
+        # Larger pool so batch fan-out reuses warm connections instead of
+        # opening new TLS sessions once the default 10 are busy
+        adapter = RateLimitedAdapter(
+            self.rate_limiter,
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=5, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.headers = {
             'User-Agent': 'RequirementsCreator/1.0'
-        })
+        }
+        self.session.headers.update(self.headers)
     
     def get_all_versions(self, library_name: str) -> List[str]:
         """Fetch all available versions from PyPI"""
+        return self.get_release_info(library_name)[0]
+    
+    def get_release_info(self, library_name: str) -> Tuple[List[str], Dict[str, str]]:
+        """Fetch all available versions and their release digests from PyPI"""
+        # The PEP 691 simple index lists versions and file hashes without the rest of
+        # the per-file metadata, a fraction of the size of the legacy JSON API payload
+        url = f"{self.simple_url}/{library_name}/"
+        
+        try:
+            response = self.session.get(url, headers={'Accept': SIMPLE_JSON_ACCEPT}, timeout=30)
+            if response.status_code != 406:
+                response.raise_for_status()
+                # Mirrors without PEP 691 support answer with the HTML index instead
+                if response.headers.get('Content-Type', '').startswith(SIMPLE_JSON_ACCEPT):
+                    info = _parse_simple_index(response.json())
+                    if info is not None:
+                        return info
+        except (KeyError, ValueError):
+            pass
+        except requests.RequestException as e:
+            log.error(f"❌ Failed to fetch versions for {library_name}: {e}")
+            return [], {}
+        
+        return self._get_release_info_legacy(library_name)
+    
+    def _get_release_info_legacy(self, library_name: str) -> Tuple[List[str], Dict[str, str]]:
+        """Fetch all available versions and their release digests from the legacy JSON API"""
         url = f"{self.base_url}/{library_name}/json"
         
         try:
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
             
-            releases = response.json()["releases"]
-            return list(releases.keys())
+            return _parse_legacy_releases(response.json())
             
         except requests.RequestException as e:
-            print(f"❌ Failed to fetch versions for {library_name}: {e}")
-            return []
+            log.error(f"❌ Failed to fetch versions for {library_name}: {e}")
+            return [], {}
         except KeyError as e:
-            print(f"❌ Invalid response format for {library_name}: {e}")
-            return []
+            log.error(f"❌ Invalid response format for {library_name}: {e}")
+            return [], {}
+    
+    async def get_release_info_async(self, library_names: List[str]) -> Dict[str, Tuple[List[str], Dict[str, str]]]:
+        """Fetch versions and release digests for several libraries concurrently"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        cached = self.batch_cache.load(
+            [f"{self.simple_url}/{name}/" for name in library_names] + [f"{self.base_url}/{name}/json" for name in library_names]
+        )
+        updates = {}
+        
+        async def get(client: httpx.AsyncClient, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[str, bytes]:
+            """GET (content type, body) through the batch cache; stale entries are revalidated"""
+            entry = cached.get(url)
+            if entry and time.time() - entry[4] < CACHE_EXPIRE_AFTER:
+                return entry[2], entry[3]
+            
+            headers = dict(headers or {})
+            if entry and entry[0]:
+                headers['If-None-Match'] = entry[0]
+            if entry and entry[1]:
+                headers['If-Modified-Since'] = entry[1]
+            response = await client.get(url, headers=headers)
+            if response.status_code == 304 and entry:
+                updates[url] = (*entry[:4], time.time())
+                return entry[2], entry[3]
+            response.raise_for_status()
+            
+            content_type = response.headers.get('Content-Type', '')
+            updates[url] = (
+                response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                content_type, response.content, time.time()
+            )
+            return content_type, response.content
+        
+        async def fetch(client: httpx.AsyncClient, library_name: str) -> Tuple[List[str], Dict[str, str]]:
+            async with semaphore:
+                try:
+                    try:
+                        content_type, body = await get(
+                            client, f"{self.simple_url}/{library_name}/", {'Accept': SIMPLE_JSON_ACCEPT}
+                        )
+                    except httpx.HTTPStatusError as e:
+                        if e.response.status_code != 406:
+                            raise
+                        content_type = ''
+                    if content_type.startswith(SIMPLE_JSON_ACCEPT):
+                        info = _parse_simple_index(json.loads(body))
+                        if info is not None:
+                            return info
+                    
+                    _, body = await get(client, f"{self.base_url}/{library_name}/json")
+                    return _parse_legacy_releases(json.loads(body))
+                except httpx.HTTPError as e:
+                    log.error(f"❌ Failed to fetch versions for {library_name}: {e}")
+                    return [], {}
+                except (KeyError, ValueError) as e:
+                    log.error(f"❌ Invalid response format for {library_name}: {e}")
+                    return [], {}
+        
+        async def throttle(request: httpx.Request) -> None:
+            """Take a rate-limit token before each request is sent"""
+            await self.rate_limiter.acquire_async()
+        
+        async with httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=30,
+            event_hooks={'request': [throttle]}
+        ) as client:
+            results = await asyncio.gather(*(fetch(client, name) for name in library_names))
+        
+        self.batch_cache.store(updates)
+        return dict(zip(library_names, results))
+    
+    def get_release_info_many(self, library_names: List[str]) -> Dict[str, Tuple[List[str], Dict[str, str]]]:
+        """Blocking wrapper around get_release_info_async"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.get_release_info_async(library_names))
+        
+        # asyncio.run refuses to nest inside a running loop (Jupyter, async hosts),
+        # so give the batch its own loop on a helper thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(lambda: asyncio.run(self.get_release_info_async(library_names))).result()
     
     def filter_stable_versions(self, versions: List[str], max_versions: int = 20) -> List[str]:
         """Filter to stable versions only and return latest N versions"""
+        # Parse each version once and sort on the parsed value
         stable_versions = []
         
         for ver in versions:
@@ -44,13 +349,13 @@ class PyPIClient:
                 if not (parsed_version.is_prerelease or 
                        parsed_version.is_postrelease or 
                        parsed_version.is_devrelease):
-                    stable_versions.append(ver)
+                    stable_versions.append((parsed_version, ver))
             except Exception:
                 continue
         
         # Sort and return latest versions
-        sorted_versions = sorted(stable_versions, key=version.parse)
-        return sorted_versions[-max_versions:] if len(sorted_versions) > max_versions else sorted_versions
+        stable_versions.sort(key=lambda item: item[0])
+        return [ver for _, ver in stable_versions[-max_versions:]]
     
     def get_latest_versions(self, library_name: str, count: int = 20) -> List[str]:
         """Get latest N stable versions of a library"""
@@ -1,86 +1,242 @@
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from logging.handlers import MemoryHandler
+from typing import Dict, List, Any, Optional, Tuple
+import logging
 import os
-import time
+import sys
 
 from .pypi_client import PyPIClient
-from .signature_extractor import SignatureExtractor
+from .signature_extractor import EXTRACTOR_VERSION, SignatureExtractor, sweep_stale_trash
 from .database_manager import SignatureDBManager
 from .version_matcher import VersionMatcher
 from .code_analyzer import CodeAnalyzer
 
 
+# Upper bound on concurrent per-version extractions (each one runs pip)
+MAX_EXTRACTION_WORKERS = 8
+
+# Progress lines are written to stderr in batches of this many; warnings flush at once
+LOG_BUFFER_CAPACITY = 64
+
+log = logging.getLogger("requirements_creator")
+
+
+def configure_logging(verbose: bool = True) -> None:
+    """Route progress output to a buffered stderr handler (verbose=False silences everything)"""
+    if not any(isinstance(handler, MemoryHandler) for handler in log.handlers):
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(MemoryHandler(LOG_BUFFER_CAPACITY, flushLevel=logging.WARNING, target=stream_handler))
+        log.propagate = False
+    # Above CRITICAL, records are dropped before they are even formatted
+    log.setLevel(logging.INFO if verbose else logging.CRITICAL + 1)
+
+
+def flush_log() -> None:
+    """Write out buffered progress lines (before prompts, forks and at stage ends)"""
+    for handler in log.handlers:
+        handler.flush()
+
+
+def _stamp_hashes(hashes: Dict[str, str]) -> Dict[str, str]:
+    """Tie release digests to EXTRACTOR_VERSION, so an extractor change invalidates stored versions"""
+    return {version: f"{EXTRACTOR_VERSION}:{digest}" for version, digest in hashes.items()}
+
+
+# Per-process extractor for pool workers, created on first use
+_worker_extractor = None
+
+
+def _extract_one(library_name: str, version: str) -> Tuple[str, Dict[str, Any]]:
+    """Extract signatures for one library version inside a pool worker"""
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = SignatureExtractor()
+    try:
+        return version, _worker_extractor.extract_version_signatures(library_name, version)
+    finally:
+        # Pool workers exit without running logging's shutdown flush
+        flush_log()
+
+
 class RequirementsCreator:
     """Main class for creating requirements.txt from code analysis"""
     
-    def __init__(self, db_path: str = "signature_database"):
+    def __init__(self, db_path: str = "signature_database", verbose: bool = True):
+        self.verbose = verbose
+        configure_logging(verbose)
+        
         self.pypi_client = PyPIClient()
-        self.signature_extractor = SignatureExtractor()
+        # Extraction workers can exit before their cleanup thread finishes
+        sweep_stale_trash()
         self.db_manager = SignatureDBManager(db_path)
-        self.version_matcher = VersionMatcher(db_path)
-        self.code_analyzer = CodeAnalyzer()
+        self.version_matcher = VersionMatcher(db_path, self.db_manager)
+        self.code_analyzer = CodeAnalyzer(cache_dir=os.path.join(db_path, ".ast_cache"))
     
-    def add_library_to_database(self, library_name: str, max_versions: int = 10) -> Dict[str, Any]:
+    def add_library_to_database(self, library_name: str, max_versions: int = 10, force: bool = False) -> Dict[str, Any]:
         """Add a library to the signature database (fully automated)"""
-        print(f"🔍 Starting automatic analysis of {library_name}")
+        log.info(f"🔍 Starting automatic analysis of {library_name}")
         
         # Check if already analyzed
-        existing_data = self.db_manager.load_library_signatures(library_name)
-        if existing_data:
-            print(f"📋 {library_name} already analyzed. Re-analyzing...")
+        if self.db_manager.library_exists(library_name):
+            log.info(f"📋 {library_name} already analyzed. Re-analyzing...")
         
-        # Get latest versions from PyPI
-        print(f"📦 Fetching versions for {library_name}...")
-        versions = self.pypi_client.get_latest_versions(library_name, max_versions)
+        # Get latest versions from PyPI; the same response carries the release hashes
+        log.info(f"📦 Fetching versions for {library_name}...")
+        all_versions, hashes = self.pypi_client.get_release_info(library_name)
+        hashes = _stamp_hashes(hashes)
+        versions = self.pypi_client.filter_stable_versions(all_versions, max_versions)
         
         if not versions:
-            print(f"❌ No versions found for {library_name}")
+            log.error(f"❌ No versions found for {library_name}")
             return {}
         
-        print(f"📊 Found {len(versions)} versions: {', '.join(versions[-5:])}...")
+        log.info(f"📊 Found {len(versions)} versions: {', '.join(versions[-5:])}...")
+        
+        # force re-extracts every version, even ones whose release and extractor are unchanged
+        unchanged = [] if force else self._unchanged_versions(library_name, versions, hashes)
+        extracted = self._extract_many([(library_name, version) for version in versions if version not in unchanged])
+        all_signatures = self._save_extracted(library_name, versions, extracted.get(library_name, {}), hashes, unchanged)
         
-        # Extract signatures for each version
-        all_signatures = {}
-        successful_versions = 0
+        flush_log()
+        return all_signatures
+    
+    def add_libraries_to_database(self, libraries: List[str], max_versions: int = 10) -> Dict[str, Dict[str, Any]]:
+        """Add several libraries, extracting every (library, version) pair in one shared pool"""
+        log.info(f"📦 Fetching versions for {len(libraries)} libraries...")
+        try:
+            releases = self.pypi_client.get_release_info_many(libraries)
+        except Exception as e:
+            log.warning(f"⚠️  Batch version fetch failed, fetching one at a time: {e}")
+            releases = {}
         
-        for version in versions:
-            print(f"  🔧 Analyzing {library_name}=={version}...")
+        # A failure for one library is reported for that library and does not stop the rest
+        pairs = []
+        plans = {}
+        for library_name in libraries:
             try:
-                signatures = self.signature_extractor.extract_version_signatures(library_name, version)
-                if signatures:
-                    all_signatures[version] = signatures
-                    successful_versions += 1
-                    print(f"    ✅ Extracted {len(signatures)} functions")
+                all_versions, hashes = releases.get(library_name, ([], {}))
+                if not all_versions:
+                    # Retry one at a time through the cached, retrying session
+                    all_versions, hashes = self.pypi_client.get_release_info(library_name)
+                hashes = _stamp_hashes(hashes)
+                versions = self.pypi_client.filter_stable_versions(all_versions, max_versions)
+                if versions:
+                    unchanged = self._unchanged_versions(library_name, versions, hashes)
+                    plans[library_name] = (versions, hashes, unchanged)
+                    pairs.extend((library_name, version) for version in versions if version not in unchanged)
                 else:
-                    print(f"    ⚠️  No signatures extracted")
+                    log.error(f"❌ No versions found for {library_name}")
             except Exception as e:
-                print(f"    ❌ Failed: {e}")
-            
-            # Small delay to be nice to PyPI
-            time.sleep(0.1)
+                log.error(f"❌ Failed to add {library_name}: {e}")
+        
+        log.info(f"🔍 Extracting {len(pairs)} versions across {len(libraries)} libraries")
+        try:
+            extracted = self._extract_many(pairs)
+        except Exception as e:
+            # The pool itself failed; every library is then reported as not extracted
+            log.error(f"❌ Extraction failed: {e}")
+            extracted = {}
+        
+        results = {}
+        for library_name in libraries:
+            results[library_name] = {}
+            if library_name not in plans:
+                continue
+            versions, hashes, unchanged = plans[library_name]
+            try:
+                results[library_name] = self._save_extracted(
+                    library_name, versions, extracted.get(library_name, {}), hashes, unchanged
+                )
+            except Exception as e:
+                log.error(f"❌ Failed to add {library_name}: {e}")
+        
+        flush_log()
+        return results
+    
+    def _extract_many(self, pairs: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """Extract signatures for (library, version) pairs in one process pool, grouped by library"""
+        extracted = {library_name: {} for library_name, _ in pairs}
+        if not pairs:
+            return extracted
+        
+        # Each version runs in its own sandbox, so fan out.
+        # Flush first so forked workers don't inherit (and repeat) buffered lines
+        flush_log()
+        with ProcessPoolExecutor(
+            max_workers=min(MAX_EXTRACTION_WORKERS, len(pairs)),
+            initializer=configure_logging,
+            initargs=(self.verbose,)
+        ) as executor:
+            futures = {
+                executor.submit(_extract_one, library_name, version): (library_name, version)
+                for library_name, version in pairs
+            }
+            for future in as_completed(futures):
+                library_name, version = futures[future]
+                try:
+                    _, signatures = future.result()
+                    if signatures:
+                        extracted[library_name][version] = signatures
+                        log.info(f"  ✅ {library_name}=={version}: extracted {len(signatures)} functions")
+                    else:
+                        log.warning(f"  ⚠️  {library_name}=={version}: no signatures extracted")
+                except Exception as e:
+                    log.error(f"  ❌ {library_name}=={version}: failed: {e}")
+        
+        # Workers' reaper threads die with the pool, so pick up whatever they left behind
+        sweep_stale_trash()
+        return extracted
+    
+    def _unchanged_versions(self, library_name: str, versions: List[str], hashes: Dict[str, str]) -> List[str]:
+        """Find the versions whose stored release and extractor hash still matches (no re-extraction needed)"""
+        stored = self.db_manager.get_version_hashes(library_name) if hashes else {}
+        if not stored:
+            return []
+        unchanged = [version for version in versions if version in hashes and stored.get(version) == hashes[version]]
+        if unchanged:
+            log.info(f"⏭️  {library_name}: {len(unchanged)}/{len(versions)} versions unchanged since last analysis")
+        return unchanged
+    
+    def _save_extracted(self, library_name: str, versions: List[str], extracted: Dict[str, Any],
+                        hashes: Optional[Dict[str, str]] = None, unchanged: List[str] = ()) -> Dict[str, Any]:
+        """Save one library's extracted versions and return them, with the unchanged ones, in release order"""
+        # Unchanged versions stay in the database as they are; they are only read back for the result
+        kept = self.db_manager.load_version_signatures(library_name, unchanged) if unchanged else {}
+        
+        # Keep versions in release order regardless of completion order
+        all_signatures = {
+            version: extracted[version] if version in extracted else kept[version]
+            for version in versions if version in extracted or version in kept
+        }
+        successful_versions = len(all_signatures)
         
         # Save to database
         if all_signatures:
-            self.db_manager.save_library_signatures(library_name, all_signatures)
-            print(f"🎉 {library_name} successfully added to database! ({successful_versions}/{len(versions)} versions)")
+            new_signatures = {version: extracted[version] for version in versions if version in extracted}
+            self.db_manager.save_library_signatures(library_name, new_signatures, hashes=hashes, keep_versions=kept)
+            self.version_matcher.clear_cache(library_name)
+            log.info(f"🎉 {library_name} successfully added to database! ({successful_versions}/{len(versions)} versions)")
         else:
-            print(f"❌ Failed to extract any signatures for {library_name}")
+            log.error(f"❌ Failed to extract any signatures for {library_name}")
         
         return all_signatures
     
-    def analyze_codebase(self, code_path: str, output_path: str = "requirements.txt", auto_add_missing: bool = False) -> Dict[str, str]:
+    def analyze_codebase(self, code_path: str, output_path: str = "requirements.txt", auto_add_missing: bool = False, imports_only: bool = False) -> Dict[str, str]:
         """Analyze codebase and generate requirements.txt"""
-        print(f"📁 Analyzing codebase at: {code_path}")
+        log.info(f"📁 Analyzing codebase at: {code_path}")
+        flush_log()
         
-        # Extract function calls from codebase
-        function_calls = self.code_analyzer.analyze_codebase(code_path)
+        # Extract function calls from codebase (or only the imported libraries in fast mode)
+        function_calls = self.code_analyzer.analyze_codebase(code_path, imports_only=imports_only)
         
         if not function_calls:
-            print("❌ No function calls found in codebase")
+            log.error("❌ No function calls found in codebase")
             return {}
         
-        print(f"📊 Found function calls for {len(function_calls)} libraries:")
+        log.info(f"📊 Found function calls for {len(function_calls)} libraries:")
         for library, calls in function_calls.items():
-            print(f"  📦 {library}: {len(calls)} functions")
+            log.info(f"  📦 {library}: {len(calls)} functions")
         
         # Check which libraries need to be added to database
         missing_libraries = []
@@ -90,15 +246,15 @@ class RequirementsCreator:
         
         # Handle missing libraries
         if missing_libraries:
-            print(f"\n⚠️  Found {len(missing_libraries)} libraries not in signature database:")
+            log.warning(f"\n⚠️  Found {len(missing_libraries)} libraries not in signature database:")
             for library in missing_libraries:
-                print(f"  📦 {library}")
+                log.info(f"  📦 {library}")
             
             if auto_add_missing:
-                print(f"\n🔧 Auto-adding {len(missing_libraries)} libraries to database...")
-                for library in missing_libraries:
-                    self.add_library_to_database(library)
+                log.info(f"\n🔧 Auto-adding {len(missing_libraries)} libraries to database...")
+                self.add_libraries_to_database(missing_libraries)
             else:
+                flush_log()
                 print(f"\n❓ Would you like to add these libraries to the signature database?")
                 print("   This will allow for accurate version matching.")
                 print("   Libraries to add:", ", ".join(missing_libraries))
@@ -106,12 +262,11 @@ class RequirementsCreator:
                 while True:
                     response = input("   Add libraries? (y/n): ").lower().strip()
                     if response in ['y', 'yes']:
-                        print(f"\n🔧 Adding {len(missing_libraries)} libraries to database...")
-                        for library in missing_libraries:
-                            self.add_library_to_database(library)
+                        log.info(f"\n🔧 Adding {len(missing_libraries)} libraries to database...")
+                        self.add_libraries_to_database(missing_libraries)
                         break
                     elif response in ['n', 'no']:
-                        print("⚠️  Skipping missing libraries. Version matching may be incomplete.")
+                        log.warning("⚠️  Skipping missing libraries. Version matching may be incomplete.")
                         break
                     else:
                         print("   Please enter 'y' or 'n'")
@@ -122,10 +277,11 @@ class RequirementsCreator:
         # Generate requirements.txt
         if requirements:
             self.version_matcher.generate_requirements_txt(requirements, output_path)
-            print(f"✅ Generated requirements.txt with {len(requirements)} libraries")
+            log.info(f"✅ Generated requirements.txt with {len(requirements)} libraries")
         else:
-            print("❌ No compatible versions found for any libraries")
+            log.error("❌ No compatible versions found for any libraries")
         
+        flush_log()
         return requirements
     
     def list_analyzed_libraries(self) -> List[str]:
@@ -140,58 +296,53 @@ class RequirementsCreator:
         """Delete a library from the database"""
         return self.db_manager.delete_library_signatures(library_name)
     
-    def update_library(self, library_name: str) -> Dict[str, Any]:
-        """Update a library in the database"""
-        print(f"🔄 Updating {library_name}...")
-        return self.add_library_to_database(library_name)
+    def update_library(self, library_name: str, force: bool = False) -> Dict[str, Any]:
+        """Update a library in the database (force re-extracts unchanged versions too)"""
+        log.info(f"🔄 Updating {library_name}...")
+        return self.add_library_to_database(library_name, force=force)
     
-    def quick_analyze(self, code_path: str, libraries: List[str] = None) -> Dict[str, str]:
-        """Quick analysis with pre-specified libraries"""
-        print(f"⚡ Quick analysis of {code_path}")
+    def quick_analyze(self, code_path: str, libraries: List[str] = None, imports_only: bool = False) -> Dict[str, str]:
+        """Quick analysis with pre-specified libraries (imports_only skips call extraction)"""
+        log.info(f"⚡ Quick analysis of {code_path}")
         
         # Add specified libraries to database if needed
         if libraries:
-            for library in libraries:
-                if not self.db_manager.library_exists(library):
-                    print(f"📦 Adding {library} to database...")
-                    self.add_library_to_database(library)
+            missing_libraries = [library for library in libraries if not self.db_manager.library_exists(library)]
+            if missing_libraries:
+                log.info(f"📦 Adding {', '.join(missing_libraries)} to database...")
+                self.add_libraries_to_database(missing_libraries)
         
         # Analyze codebase
-        return self.analyze_codebase(code_path)
+        return self.analyze_codebase(code_path, imports_only=imports_only)
     
     def batch_add_libraries(self, libraries: List[str]) -> Dict[str, bool]:
         """Add multiple libraries to database"""
-        results = {}
+        log.info(f"📦 Batch adding {len(libraries)} libraries...")
         
-        print(f"📦 Batch adding {len(libraries)} libraries...")
-        for i, library in enumerate(libraries, 1):
-            print(f"[{i}/{len(libraries)}] Processing {library}...")
-            try:
-                signatures = self.add_library_to_database(library)
-                results[library] = bool(signatures)
-            except Exception as e:
-                print(f"❌ Failed to add {library}: {e}")
-                results[library] = False
+        # Version lists are fetched concurrently and every version shares one pool
+        added = self.add_libraries_to_database(libraries)
+        results = {library: bool(signatures) for library, signatures in added.items()}
         
         successful = sum(results.values())
-        print(f"✅ Batch complete: {successful}/{len(libraries)} libraries added successfully")
+        log.info(f"✅ Batch complete: {successful}/{len(libraries)} libraries added successfully")
         
+        flush_log()
         return results
     
     def analyze_code_string(self, code_string: str, auto_add_missing: bool = False) -> Dict[str, str]:
         """Analyze code from a string and generate requirements"""
-        print(f"📝 Analyzing code string...")
+        log.info(f"📝 Analyzing code string...")
         
         # Extract function calls from code string
         function_calls = self.code_analyzer.analyze_code_string(code_string)
         
         if not function_calls:
-            print("❌ No function calls found in code")
+            log.error("❌ No function calls found in code")
             return {}
         
-        print(f"📊 Found function calls for {len(function_calls)} libraries:")
+        log.info(f"📊 Found function calls for {len(function_calls)} libraries:")
         for library, calls in function_calls.items():
-            print(f"  📦 {library}: {len(calls)} functions")
+            log.info(f"  📦 {library}: {len(calls)} functions")
         
         # Check which libraries need to be added to database
         missing_libraries = []
@@ -201,24 +352,24 @@ class RequirementsCreator:
         
         # Handle missing libraries
         if missing_libraries:
-            print(f"\n⚠️  Found {len(missing_libraries)} libraries not in signature database:")
+            log.warning(f"\n⚠️  Found {len(missing_libraries)} libraries not in signature database:")
             for library in missing_libraries:
-                print(f"  📦 {library}")
+                log.info(f"  📦 {library}")
             
             if auto_add_missing:
-                print(f"\n🔧 Auto-adding {len(missing_libraries)} libraries to database...")
-                for library in missing_libraries:
-                    self.add_library_to_database(library)
+                log.info(f"\n🔧 Auto-adding {len(missing_libraries)} libraries to database...")
+                self.add_libraries_to_database(missing_libraries)
             else:
-                print(f"\n⚠️  Missing libraries: {', '.join(missing_libraries)}")
-                print("   Some version matching may be incomplete.")
+                log.warning(f"\n⚠️  Missing libraries: {', '.join(missing_libraries)}")
+                log.info("   Some version matching may be incomplete.")
         
         # Match function calls to versions
         requirements = self.version_matcher.match_codebase_requirements(function_calls)
         
         if requirements:
-            print(f"✅ Found compatible versions for {len(requirements)} libraries")
+            log.info(f"✅ Found compatible versions for {len(requirements)} libraries")
         else:
-            print("❌ No compatible versions found for any libraries")
+            log.error("❌ No compatible versions found for any libraries")
         
+        flush_log()
         return requirements 
\ No newline at end of file
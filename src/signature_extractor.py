@@ -1,149 +1,530 @@
 import inspect
-import importlib
+import importlib.machinery
+import importlib.metadata
+import logging
+import pickle
+import queue
+import shutil
 import subprocess
 import sys
 import os
 import tempfile
+import threading
+import types
 import venv
 from typing import Dict, Any, List, Optional
 import ast
 import json
+from packaging.requirements import InvalidRequirement, Requirement
 
 
-class IsolatedEnvironment:
-    """Context manager for isolated Python environment"""
+log = logging.getLogger("requirements_creator")
+
+
+# Shared base venv and pip wheel cache, reused across versions and runs
+DEFAULT_CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "requirements_creator", "extractor")
+
+# Per-version install directories are created with this prefix; finished ones get the
+# suffix and are deleted by a background thread
+TEMP_DIR_PREFIX = "req_creator_"
+TRASH_SUFFIX = ".trash"
+
+# Imports a C-extension package in a fresh interpreter and pickles its signatures to stdout
+EXTRACT_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_extract_worker.py")
+
+# Packages shipping any of these can only be analyzed by importing them
+EXTENSION_SUFFIXES = tuple(importlib.machinery.EXTENSION_SUFFIXES)
+
+# Bump when the extracted signature format or coverage changes; stored versions
+# extracted by another version are re-extracted even if their release is unchanged
+EXTRACTOR_VERSION = 1
+
+# Decorators that turn a method into something other than a callable
+PROPERTY_DECORATORS = frozenset({'property', 'cached_property', 'setter', 'getter', 'deleter'})
+
+
+class _SourceText:
+    """Default or annotation that can only be shown as its source text"""
     
-    def __init__(self, temp_dir: str):
-        self.temp_dir = temp_dir
-        self.original_sys_path = sys.path.copy()
-        self.original_modules = set(sys.modules.keys())
+    __slots__ = ('text',)
     
-    def __enter__(self):
-        # Add the site-packages to Python path
-        site_packages = os.path.join(self.temp_dir, "lib", "python3.8", "site-packages")
-        if os.path.exists(site_packages):
-            sys.path.insert(0, site_packages)
-        
-        # Also check for other possible site-packages locations
-        for root, dirs, files in os.walk(self.temp_dir):
-            if "site-packages" in root:
-                sys.path.insert(0, root)
-        
-        return self
+    def __init__(self, text: str):
+        self.text = text
     
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        # Restore original Python path
-        sys.path = self.original_sys_path
-        
-        # Clean up imported modules
-        new_modules = set(sys.modules.keys()) - self.original_modules
-        for module_name in new_modules:
-            if module_name in sys.modules:
-                del sys.modules[module_name]
+    def __repr__(self):
+        return self.text
+
+
+def _source_value(node: ast.AST):
+    """Literal value of an expression node, or its source text if it is not a literal"""
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return _SourceText(ast.unparse(node))
+
+
+def _annotation(node: Optional[ast.AST]):
+    """Annotation as inspect would display it"""
+    if node is None:
+        return inspect.Parameter.empty
+    return _SourceText(ast.unparse(node))
+
+
+def signature_from_ast(args: ast.arguments, returns: Optional[ast.AST] = None, bound: bool = False) -> inspect.Signature:
+    """Build an inspect.Signature from a def's arguments node (bound drops the first parameter)"""
+    Parameter = inspect.Parameter
+    parameters = []
+    
+    positional = [(arg, Parameter.POSITIONAL_ONLY) for arg in args.posonlyargs]
+    positional += [(arg, Parameter.POSITIONAL_OR_KEYWORD) for arg in args.args]
+    # Defaults belong to the last positional parameters
+    defaults = [Parameter.empty] * (len(positional) - len(args.defaults)) + [_source_value(d) for d in args.defaults]
+    for (arg, kind), default in zip(positional, defaults):
+        parameters.append(Parameter(arg.arg, kind, default=default, annotation=_annotation(arg.annotation)))
+    
+    if args.vararg:
+        parameters.append(Parameter(args.vararg.arg, Parameter.VAR_POSITIONAL, annotation=_annotation(args.vararg.annotation)))
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        default = Parameter.empty if default is None else _source_value(default)
+        parameters.append(Parameter(arg.arg, Parameter.KEYWORD_ONLY, default=default, annotation=_annotation(arg.annotation)))
+    if args.kwarg:
+        parameters.append(Parameter(args.kwarg.arg, Parameter.VAR_KEYWORD, annotation=_annotation(args.kwarg.annotation)))
+    
+    if bound and parameters and parameters[0].kind in (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD):
+        parameters = parameters[1:]
+    return inspect.Signature(parameters, return_annotation=_annotation(returns))
+
+
+def _iter_definitions(body: List[ast.stmt]):
+    """Yield defs and from-imports in a block, including those under if/try"""
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.ImportFrom)):
+            yield node
+        elif isinstance(node, ast.If):
+            yield from _iter_definitions(node.body)
+            yield from _iter_definitions(node.orelse)
+        elif isinstance(node, ast.Try):
+            yield from _iter_definitions(node.body)
+            for handler in node.handlers:
+                yield from _iter_definitions(handler.body)
+            yield from _iter_definitions(node.orelse)
+            yield from _iter_definitions(node.finalbody)
+
+
+def _decorator_names(node) -> set:
+    """Last dotted component of each decorator (property.setter -> setter)"""
+    names = set()
+    for decorator in node.decorator_list:
+        if isinstance(decorator, ast.Call):
+            decorator = decorator.func
+        if isinstance(decorator, ast.Attribute):
+            names.add(decorator.attr)
+        elif isinstance(decorator, ast.Name):
+            names.add(decorator.id)
+    return names
+
+
+_reaper_queue: "queue.Queue[str]" = queue.Queue()
+_reaper_thread: Optional[threading.Thread] = None
+_reaper_lock = threading.Lock()
+
+
+def _reaper_loop(dirs: "queue.Queue[str]") -> None:
+    """Delete queued directories for the life of the process"""
+    while True:
+        path = dirs.get()
+        shutil.rmtree(path, ignore_errors=True)
+        dirs.task_done()
+
+
+def _reset_reaper() -> None:
+    """Give a forked child its own queue; the parent's thread does not exist there"""
+    global _reaper_queue, _reaper_thread, _reaper_lock
+    _reaper_queue = queue.Queue()
+    _reaper_thread = None
+    _reaper_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_reaper)
+
+
+def discard_directory(path: str) -> None:
+    """Rename a directory out of the way and delete it in the background"""
+    global _reaper_thread
+    trash_path = path + TRASH_SUFFIX
+    try:
+        os.rename(path, trash_path)
+    except OSError:
+        trash_path = path
+    
+    with _reaper_lock:
+        if _reaper_thread is None:
+            _reaper_thread = threading.Thread(target=_reaper_loop, args=(_reaper_queue,), name="reaper", daemon=True)
+            _reaper_thread.start()
+    _reaper_queue.put(trash_path)
+
+
+def sweep_stale_trash(directory: Optional[str] = None) -> None:
+    """Queue trash left behind by processes that exited before their reaper finished"""
+    directory = directory or tempfile.gettempdir()
+    try:
+        with os.scandir(directory) as entries:
+            stale = [
+                entry.path for entry in entries
+                if entry.name.startswith(TEMP_DIR_PREFIX) and entry.name.endswith(TRASH_SUFFIX)
+            ]
+    except OSError:
+        return
+    for path in stale:
+        discard_directory(path)
 
 
 class SignatureExtractor:
     """Extract function signatures from Python libraries"""
     
-    def __init__(self):
+    def __init__(self, cache_root: str = DEFAULT_CACHE_ROOT):
         self.temp_dir = None
+        # One venv provides pip for every install; versions go to throwaway --target dirs
+        self._base_venv = os.path.join(cache_root, f"venv-py{sys.version_info.major}.{sys.version_info.minor}")
+        self._wheel_cache = os.path.join(cache_root, "wheels")
+    
+    def _python_path(self) -> str:
+        """Path of the interpreter inside the base venv"""
+        if os.name == 'nt':  # Windows
+            return os.path.join(self._base_venv, "Scripts", "python.exe")
+        else:  # Unix/Linux/macOS
+            return os.path.join(self._base_venv, "bin", "python")
     
-    def create_isolated_environment(self, package_spec: str) -> IsolatedEnvironment:
-        """Create isolated environment and install package"""
-        import tempfile
-        import subprocess
+    def _ensure_base_venv(self) -> str:
+        """Create the shared base venv on first use and return its interpreter"""
+        # pip is run as "python -m pip": the pip script's shebang would still
+        # point at the temporary build directory after the rename below
+        python_path = self._python_path()
+        if os.path.exists(python_path):
+            return python_path
         
+        # Build next to the final location and rename into place, so
+        # concurrent workers never see a half-created venv
+        parent = os.path.dirname(self._base_venv)
+        os.makedirs(parent, exist_ok=True)
+        build_dir = tempfile.mkdtemp(prefix="venv_", dir=parent)
+        venv.create(build_dir, with_pip=True)
+        try:
+            os.rename(build_dir, self._base_venv)
+        except OSError:
+            # Another worker won the race; use theirs
+            shutil.rmtree(build_dir, ignore_errors=True)
+        return python_path
+    
+    def create_isolated_environment(self, package_spec: str) -> Optional[str]:
+        """Install package into a fresh target directory using the shared venv's pip and return it"""
         # Create temporary directory
-        self.temp_dir = tempfile.mkdtemp(prefix="req_creator_")
+        self.temp_dir = tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX)
+        
+        # --no-deps: reading the package's source only needs the package itself
+        log.info(f"  📦 Installing {package_spec}...")
+        if not self._pip_install(self.temp_dir, [package_spec], "--no-deps"):
+            discard_directory(self.temp_dir)
+            return None
+        
+        return self.temp_dir
+    
+    def install_dependencies(self, target_dir: str, package_spec: str) -> Optional[str]:
+        """Install the dependencies of the package in target_dir into a second directory, for importing it"""
+        requirements = self._runtime_requirements(target_dir)
+        if not requirements:
+            return None
+        
+        deps_dir = tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX)
+        log.info(f"  📦 Installing dependencies of {package_spec}...")
+        if not self._pip_install(deps_dir, requirements):
+            discard_directory(deps_dir)
+            return None
         
+        return deps_dir
+    
+    def _runtime_requirements(self, target_dir: str) -> List[str]:
+        """Requires-Dist entries of the packages installed in target_dir that apply here (no extras)"""
+        requirements = []
+        for distribution in importlib.metadata.distributions(path=[target_dir]):
+            for requirement_str in distribution.requires or ():
+                try:
+                    requirement = Requirement(requirement_str)
+                except InvalidRequirement:
+                    continue
+                if requirement.marker is None or requirement.marker.evaluate({"extra": ""}):
+                    requirements.append(str(requirement))
+        return requirements
+    
+    def _pip_install(self, target_dir: str, package_specs: List[str], *extra_args: str) -> bool:
+        """Run the shared venv's pip into target_dir, reporting whether it succeeded"""
         try:
-            # Create virtual environment
-            venv.create(self.temp_dir, with_pip=True)
+            python_path = self._ensure_base_venv()
             
-            # Determine pip path
-            if os.name == 'nt':  # Windows
-                pip_path = os.path.join(self.temp_dir, "Scripts", "pip")
-            else:  # Unix/Linux/macOS
-                pip_path = os.path.join(self.temp_dir, "bin", "pip")
-            
-            # Install the package
-            print(f"  📦 Installing {package_spec}...")
+            # --no-compile: skip .pyc generation for a directory we delete afterwards
             result = subprocess.run(
-                [pip_path, "install", package_spec],
+                [
+                    python_path, "-m", "pip", "install",
+                    "--target", target_dir,
+                    *extra_args,
+                    "--no-compile",
+                    "--disable-pip-version-check",
+                    "--cache-dir", self._wheel_cache,
+                    *package_specs
+                ],
                 capture_output=True,
                 text=True,
                 timeout=300  # 5 minutes timeout
             )
             
             if result.returncode != 0:
-                print(f"  ⚠️  Installation failed: {result.stderr}")
-                return None
+                log.warning(f"  ⚠️  Installation failed: {result.stderr}")
+                return False
             
-            return IsolatedEnvironment(self.temp_dir)
+            return True
             
         except Exception as e:
-            print(f"  ❌ Failed to create environment: {e}")
-            return None
+            log.error(f"  ❌ Failed to create environment: {e}")
+            return False
     
     def extract_version_signatures(self, library_name: str, version: str) -> Dict[str, Any]:
         """Extract all function signatures for a specific version"""
         package_spec = f"{library_name}=={version}"
         
-        env = self.create_isolated_environment(package_spec)
-        if not env:
+        target_dir = self.create_isolated_environment(package_spec)
+        if not target_dir:
             return {}
         
+        deps_dir = None
         try:
-            with env:
-                module = importlib.import_module(library_name)
-                signatures = self.extract_all_signatures(module)
+            # Pure-Python packages are read from source, without running their import-time code
+            signatures = self.extract_source_signatures(target_dir, library_name)
+            if signatures is not None:
                 return signatures
+            
+            # Otherwise import in a separate interpreter, so nothing the library
+            # loads (modules, C state) outlives this version. Importing runs the
+            # package's code, so its dependencies are needed on the path too
+            deps_dir = self.install_dependencies(target_dir, package_spec)
+            result = subprocess.run(
+                [sys.executable, EXTRACT_WORKER, target_dir, *([deps_dir] if deps_dir else []), library_name],
+                capture_output=True,
+                timeout=120
+            )
+            if result.returncode != 0:
+                error_lines = result.stderr.decode(errors='replace').strip().splitlines()
+                log.error(f"  ❌ Failed to analyze {package_spec}: {error_lines[-1] if error_lines else result.returncode}")
+                return {}
+            return pickle.loads(result.stdout)
         except Exception as e:
-            print(f"  ❌ Failed to analyze {package_spec}: {e}")
+            log.error(f"  ❌ Failed to analyze {package_spec}: {e}")
             return {}
         finally:
-            # Clean up temporary directory
+            # Deleting an install is thousands of unlinks; don't make the next version wait
             if self.temp_dir and os.path.exists(self.temp_dir):
-                import shutil
+                discard_directory(self.temp_dir)
+            if deps_dir:
+                discard_directory(deps_dir)
+    
+    def _find_source_modules(self, target_dir: str, library_name: str) -> Optional[Dict[str, tuple]]:
+        """Map dotted module names to (path, is_package), or None if the package needs importing"""
+        root = os.path.join(target_dir, library_name)
+        if not os.path.isdir(root):
+            if os.path.isfile(root + ".py"):
+                return {library_name: (root + ".py", False)}
+            return None
+        if not os.path.isfile(os.path.join(root, "__init__.py")):
+            return None
+        
+        modules = {}
+        stack = [(root, library_name)]
+        while stack:
+            directory, dotted = stack.pop()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if os.path.isfile(os.path.join(entry.path, "__init__.py")):
+                            stack.append((entry.path, f"{dotted}.{entry.name}"))
+                    elif entry.name.endswith(EXTENSION_SUFFIXES):
+                        # C extensions define API that source parsing cannot see
+                        return None
+                    elif entry.name == "__init__.py":
+                        modules[dotted] = (entry.path, True)
+                    elif entry.name.endswith(".py"):
+                        modules[f"{dotted}.{entry.name[:-3]}"] = (entry.path, False)
+        return modules
+    
+    def _parse_source_module(self, path: str) -> tuple:
+        """Signatures defined in one source file, plus its from-imports and class bases"""
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read(), filename=path)
+        
+        definitions = {}
+        imports = []
+        bases = {}
+        for node in _iter_definitions(tree.body):
+            if isinstance(node, ast.ImportFrom):
+                imports.append(node)
+            elif node.name.startswith('_'):
+                continue
+            elif isinstance(node, ast.ClassDef):
+                definitions[node.name] = self.extract_source_class_methods(node)
+                bases[node.name] = [ast.unparse(base) for base in node.bases]
+            else:
                 try:
-                    shutil.rmtree(self.temp_dir)
-                except:
-                    pass
+                    definitions[node.name] = self.format_signature(signature_from_ast(node.args, node.returns))
+                except ValueError:
+                    continue
+        return definitions, imports, bases
     
-    def extract_all_signatures(self, module) -> Dict[str, Any]:
-        """Extract all public function signatures from a module"""
-        signatures = {}
+    def extract_source_class_methods(self, node: ast.ClassDef) -> Dict[str, Any]:
+        """Extract public methods from a class definition node"""
+        methods = {}
+        
+        for item in _iter_definitions(node.body):
+            if not isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) or item.name.startswith('_'):
+                continue
+            decorators = _decorator_names(item)
+            if decorators & PROPERTY_DECORATORS:
+                continue
+            try:
+                # Classmethods come back bound from the class, so cls is not part of the signature
+                sig = signature_from_ast(item.args, item.returns, bound='classmethod' in decorators)
+                methods[item.name] = self.format_signature(sig)
+            except ValueError:
+                continue
+        
+        return methods
+    
+    def extract_source_signatures(self, target_dir: str, library_name: str) -> Optional[Dict[str, Any]]:
+        """Extract public signatures by parsing the installed .py files (None if the package must be imported)"""
+        modules = self._find_source_modules(target_dir, library_name)
+        if not modules:
+            return None
         
         try:
-            # Get all public attributes
-            for name, obj in inspect.getmembers(module):
-                if self.is_public_api(name, obj):
-                    try:
-                        if inspect.isfunction(obj) or inspect.ismethod(obj):
-                            sig = inspect.signature(obj)
-                            signatures[name] = self.format_signature(sig)
-                        elif inspect.isclass(obj):
-                            # Extract class methods
-                            class_methods = self.extract_class_methods(obj)
-                            if class_methods:
-                                signatures[name] = class_methods
-                        elif self.is_ufunc(obj):
-                            # Handle ufuncs (numpy universal functions)
-                            signatures[name] = self.format_ufunc_signature(obj)
-                    except (ValueError, TypeError, AttributeError) as e:
-                        # Skip functions with problematic signatures
+            parsed = {dotted: self._parse_source_module(path) for dotted, (path, _) in modules.items()}
+        except (SyntaxError, ValueError, OSError) as e:
+            log.warning(f"  ⚠️  Could not parse {library_name} sources, importing instead: {e}")
+            return None
+        
+        namespaces = {}
+        
+        def namespace(dotted: str) -> Dict[str, Any]:
+            """Names bound in a module: its own defs plus what it re-exports (submodules as dotted strings)"""
+            if dotted in namespaces:
+                return namespaces[dotted]
+            # Registered before resolving imports so import cycles terminate
+            names = namespaces[dotted] = {}
+            definitions, imports, bases = parsed[dotted]
+            package = dotted if modules[dotted][1] else dotted.rpartition('.')[0]
+            
+            for node in imports:
+                if node.level:
+                    parts = package.split('.')
+                    base = '.'.join(parts[:len(parts) - node.level + 1] + ([node.module] if node.module else []))
+                else:
+                    base = node.module
+                
+                for alias in node.names:
+                    if alias.name == '*':
+                        if base in parsed:
+                            names.update((name, value) for name, value in namespace(base).items() if not name.startswith('_'))
                         continue
+                    
+                    submodule = f"{base}.{alias.name}"
+                    if submodule in parsed:
+                        names[alias.asname or alias.name] = submodule
+                    elif base in parsed:
+                        value = namespace(base).get(alias.name)
+                        if value is not None:
+                            names[alias.asname or alias.name] = value
+            
+            names.update(definitions)
+            
+            # Classes inherit methods from bases defined in the package
+            for class_name, base_names in bases.items():
+                methods = {}
+                for base_name in reversed(base_names):
+                    head, _, attr = base_name.partition('.')
+                    value = names.get(head)
+                    if attr and isinstance(value, str) and '.' not in attr:
+                        value = namespace(value).get(attr)
+                    if isinstance(value, dict) and "required_params" not in value:
+                        methods.update(value)
+                methods.update(definitions[class_name])
+                names[class_name] = methods
+            return names
+        
+        def build(dotted: str, visited: set) -> Dict[str, Any]:
+            """Public signatures of a module, with its public submodules nested by name"""
+            visited.add(dotted)
+            signatures = {}
+            
+            for name, value in namespace(dotted).items():
+                # Classes without public methods are left out, as with imported modules
+                if not name.startswith('_') and value and not isinstance(value, str):
+                    signatures[name] = value
             
-            # Also check for submodules
-            for name, obj in inspect.getmembers(module):
-                if inspect.ismodule(obj) and hasattr(obj, '__name__'):
-                    if obj.__name__.startswith(module.__name__):
-                        sub_signatures = self.extract_all_signatures(obj)
-                        if sub_signatures:
-                            signatures[f"{name}"] = sub_signatures
+            prefix = dotted + '.'
+            for child in modules:
+                name = child[len(prefix):]
+                if not child.startswith(prefix) or '.' in name or name.startswith('_') or child in visited:
+                    continue
+                sub_signatures = build(child, visited)
+                if sub_signatures:
+                    signatures[name] = sub_signatures
             
+            return signatures
+        
+        return build(library_name, set())
+    
+    def extract_all_signatures(self, module, visited: Optional[set] = None) -> Dict[str, Any]:
+        """Extract all public function signatures from a module"""
+        signatures = {}
+        
+        # Ids of modules already walked, so cycles and re-exported submodules are visited once
+        if visited is None:
+            visited = set()
+        visited.add(id(module))
+        
+        try:
+            # Submodules are only followed among __all__ when the module declares it
+            exported = getattr(module, '__all__', None)
+            exported = set(exported) if isinstance(exported, (list, tuple)) else None
+            
+            # One pass over vars(): a plain dict read, where getmembers sorts and probes every attribute
+            for name, obj in list(vars(module).items()):
+                if name[:1] == '_':
+                    continue
+                
+                # Cheap type checks first, so C-extension objects are not probed
+                obj_type = type(obj)
+                try:
+                    if obj_type is types.FunctionType or obj_type is types.MethodType:
+                        sig = inspect.signature(obj)
+                        signatures[name] = self.format_signature(sig)
+                    elif isinstance(obj, type):
+                        # Extract class methods
+                        class_methods = self.extract_class_methods(obj)
+                        if class_methods:
+                            signatures[name] = class_methods
+                    elif isinstance(obj, types.ModuleType):
+                        if id(obj) in visited or (exported is not None and name not in exported):
+                            continue
+                        if getattr(obj, '__name__', '').startswith(module.__name__):
+                            sub_signatures = self.extract_all_signatures(obj, visited)
+                            if sub_signatures:
+                                signatures[name] = sub_signatures
+                    elif self.is_ufunc(obj):
+                        # Handle ufuncs (numpy universal functions)
+                        signatures[name] = self.format_ufunc_signature(obj)
+                except (ValueError, TypeError, AttributeError) as e:
+                    # Skip functions with problematic signatures
+                    continue
+                    
         except Exception as e:
-            print(f"  ⚠️  Error extracting signatures: {e}")
+            log.warning(f"  ⚠️  Error extracting signatures: {e}")
         
         return signatures
     
@@ -166,31 +547,25 @@ class SignatureExtractor:
     
     def is_public_api(self, name: str, obj) -> bool:
         """Determine if something is part of the public API"""
-        # Skip private attributes
-        if name.startswith('_'):
+        # Dunders such as __doc__ or __path__ are covered by the underscore check
+        if name[:1] == '_':
             return False
         
-        # Skip built-in attributes
-        if name in ['__builtins__', '__doc__', '__file__', '__name__', '__package__', '__path__']:
-            return False
-        
-        # Skip imported modules that aren't part of the package
-        if inspect.ismodule(obj):
-            if hasattr(obj, '__name__') and not obj.__name__.startswith('__'):
-                return True
-            return False
+        # Skip modules like __main__ or __future__
+        if type(obj) is types.ModuleType:
+            return not getattr(obj, '__name__', '_').startswith('__')
         
         return True
     
     def format_signature(self, sig) -> Dict[str, Any]:
         """Format signature into a structured format"""
-        parameters = {}
         required_params = []
         optional_params = []
         defaults = {}
         
         for name, param in sig.parameters.items():
-            parameters[name] = str(param)
+            # The same few names (self, name, data, ...) recur across every function and version
+            name = sys.intern(name)
             
             if param.default is inspect.Parameter.empty:
                 required_params.append(name)
@@ -202,9 +577,9 @@ class SignatureExtractor:
                 except:
                     defaults[name] = "Unknown"
         
+        # The parameter set is required_params + optional_params; the rendered
+        # signature and a separate parameter list were never read back
         return {
-            "signature": str(sig),
-            "parameters": list(parameters.keys()),
             "required_params": required_params,
             "optional_params": optional_params,
             "defaults": defaults
@@ -228,8 +603,6 @@ class SignatureExtractor:
             else:
                 # Fallback for ufuncs without callable signature
                 return {
-                    "signature": "ufunc(*args, **kwargs)",
-                    "parameters": ["args", "kwargs"],
                     "required_params": ["args"],
                     "optional_params": ["kwargs"],
                     "defaults": {}
@@ -237,8 +610,6 @@ class SignatureExtractor:
         except:
             # Fallback for any ufunc
             return {
-                "signature": "ufunc(*args, **kwargs)",
-                "parameters": ["args", "kwargs"],
                 "required_params": ["args"],
                 "optional_params": ["kwargs"],
                 "defaults": {}
@@ -1,97 +1,161 @@
-import json
+from functools import lru_cache
+import logging
 import os
+import threading
 from typing import Dict, List, Set, Optional, Any
 from packaging import version as pkg_version
 
+from .database_manager import SignatureDBManager
+
+
+log = logging.getLogger("requirements_creator")
+
+
+@lru_cache(maxsize=4096)
+def _parse_version(version_str: str) -> pkg_version.Version:
+    """Parse a version string, memoized since the same strings are parsed repeatedly"""
+    return pkg_version.parse(version_str)
+
+
+class _LibraryCache:
+    """Matching data loaded for one library, kept together so it is dropped as a unit"""
+    
+    __slots__ = ("signatures", "loaded_functions", "sorted_versions", "lock")
+    
+    def __init__(self, versions: List[str]):
+        # version -> func_name -> (parameter set, accepts **kwargs), for the functions fetched so far
+        self.signatures: Dict[str, Dict[str, tuple]] = {version_str: {} for version_str in versions}
+        self.loaded_functions: Set[str] = set()
+        # Newest first, sorted once
+        self.sorted_versions: List[str] = sorted(versions, key=_parse_version, reverse=True)
+        # Serializes fetching functions that are not loaded yet
+        self.lock = threading.Lock()
+
 
 class VersionMatcher:
     """Match function calls to compatible library versions"""
     
-    def __init__(self, signature_db_path: str = "signature_database"):
+    def __init__(self, signature_db_path: str = "signature_database", db_manager: Optional[SignatureDBManager] = None):
         self.signature_db_path = signature_db_path
-        self.signature_db = self.load_signature_database()
+        self.db_manager = db_manager or SignatureDBManager(signature_db_path)
+        # Libraries are loaded on first use, and only the functions a codebase calls
+        self._cache: Dict[str, _LibraryCache] = {}
     
     def load_signature_database(self) -> Dict[str, Dict[str, Any]]:
-        """Load the signature database from files"""
+        """Load every library in the signature database"""
         db = {}
         
-        if not os.path.exists(self.signature_db_path):
-            return db
-        
-        for filename in os.listdir(self.signature_db_path):
-            if filename.endswith('_signatures.json'):
-                library_name = filename.replace('_signatures.json', '')
-                file_path = os.path.join(self.signature_db_path, filename)
-                
-                try:
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
-                        db[library_name] = data
-                except Exception as e:
-                    print(f"⚠️  Error loading {filename}: {e}")
+        for library_name in self.db_manager.list_analyzed_libraries():
+            data = self.db_manager.load_library_signatures(library_name)
+            if data:
+                db[library_name] = data
         
         return db
     
+    def _get_fast_signatures(self, library_name: str, func_names: List[str]) -> Optional[_LibraryCache]:
+        """Fetch matching data for the given functions, memoized (missing libraries are not cached)"""
+        # Read the entry once: clear_cache may drop it from another thread at any point
+        state = self._cache.get(library_name)
+        if state is None:
+            versions = self.db_manager.list_versions(library_name)
+            if versions is None:
+                return None
+            state = self._cache.setdefault(library_name, _LibraryCache(versions))
+        
+        with state.lock:
+            missing = [func_name for func_name in func_names if func_name not in state.loaded_functions]
+            if missing:
+                for version_str, func_name, params, accepts_kwargs in self.db_manager.iter_function_parameters(library_name, missing):
+                    state.signatures.setdefault(version_str, {})[func_name] = (params, accepts_kwargs)
+                state.loaded_functions.update(missing)
+        return state
+    
+    def clear_cache(self, library_name: Optional[str] = None) -> None:
+        """Forget loaded signatures (all of them, or one library's after it changes)"""
+        if library_name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(library_name, None)
+    
     def find_compatible_versions(self, library_name: str, function_calls: Dict[str, Any]) -> List[str]:
+        """Find the newest version that supports the observed function calls (as a one-element list)"""
+        state = self._get_fast_signatures(library_name, list(function_calls))
+        if state is None:
+            log.warning(f"⚠️  No signature data found for {library_name}")
+            return []
+        
+        simple, called = self._partition_calls(function_calls)
+        
+        # Only the latest compatible version is used, so stop at the first hit
+        for version_str in state.sorted_versions:
+            if self.version_supports_calls(version_str, state.signatures[version_str], called, simple):
+                return [version_str]
+        
+        return []
+    
+    def find_all_compatible_versions(self, library_name: str, function_calls: Dict[str, Any]) -> List[str]:
         """Find all versions that support the observed function calls"""
-        if library_name not in self.signature_db:
-            print(f"⚠️  No signature data found for {library_name}")
+        state = self._get_fast_signatures(library_name, list(function_calls))
+        if state is None:
+            log.warning(f"⚠️  No signature data found for {library_name}")
             return []
         
-        library_data = self.signature_db[library_name]
-        versions = library_data.get("versions", {})
+        simple, called = self._partition_calls(function_calls)
         
         compatible_versions = []
         
-        for version_str, version_signatures in versions.items():
-            if self.version_supports_calls(version_str, version_signatures, function_calls):
+        for version_str, version_signatures in state.signatures.items():
+            if self.version_supports_calls(version_str, version_signatures, called, simple):
                 compatible_versions.append(version_str)
         
         return compatible_versions
     
-    def version_supports_calls(self, version_str: str, signatures: Dict[str, Any], function_calls: Dict[str, Any]) -> bool:
-        """Check if a specific version supports all observed function calls"""
-        for func_name, call_info in function_calls.items():
-            if not self.function_compatible_in_version(func_name, call_info, signatures):
+    def _partition_calls(self, function_calls: Dict[str, Any]) -> tuple:
+        """Split calls into names used without arguments and (function, argument set) pairs, once per query"""
+        simple = frozenset(func_name for func_name, call_info in function_calls.items() if not call_info.get("arguments"))
+        called = [
+            (func_name, frozenset(call_info["arguments"]))
+            for func_name, call_info in function_calls.items() if call_info.get("arguments")
+        ]
+        return simple, called
+    
+    def version_supports_calls(self, version_str: str, signatures: Dict[str, tuple], called: List[tuple], simple: frozenset = frozenset()) -> bool:
+        """Check if a specific version supports all observed (function, argument set) calls"""
+        # Calls without arguments only need the function to exist: one containment pass
+        if not signatures.keys() >= simple:
+            return False
+        
+        for func_name, called_args in called:
+            if not self.function_compatible_in_version(func_name, called_args, signatures):
                 return False
         
         return True
     
-    def function_compatible_in_version(self, func_name: str, call_info: Dict[str, Any], signatures: Dict[str, Any]) -> bool:
+    def function_compatible_in_version(self, func_name: str, called_args: frozenset, signatures: Dict[str, tuple]) -> bool:
         """Check if a specific function call is compatible with a version"""
         # Check if function exists in this version
-        if func_name not in signatures:
+        fast_sig = signatures.get(func_name)
+        if fast_sig is None:
             return False
         
-        func_sig = signatures[func_name]
-        called_args = set(call_info.get("arguments", []))
-        
         # If no arguments were called, just check if function exists
         if not called_args:
             return True
         
-        # Check if all called arguments exist in this version
-        available_args = set(func_sig.get("parameters", []))
-        
-        # Check if function accepts **kwargs (any keyword arguments)
-        accepts_kwargs = "kwargs" in available_args
-        
-        for arg in called_args:
-            if arg not in available_args and not accepts_kwargs:
-                return False
-        
-        return True
+        # All called arguments must exist, unless the function accepts **kwargs
+        available_args, accepts_kwargs = fast_sig
+        return accepts_kwargs or called_args <= available_args
     
     def resolve_version_constraints(self, library_name: str, compatible_versions: List[str]) -> str:
         """Convert compatible versions to version constraint string"""
         if not compatible_versions:
             return None
         
-        # Sort versions
-        sorted_versions = sorted(compatible_versions, key=pkg_version.parse)
-        
-        # Choose the most recent stable version
-        latest_version = sorted_versions[-1]
+        # find_compatible_versions already returns just the newest compatible version
+        if len(compatible_versions) == 1:
+            latest_version = compatible_versions[0]
+        else:
+            latest_version = max(compatible_versions, key=_parse_version)
         
         # For now, return exact version
         # In a more sophisticated implementation, you could return ranges
@@ -102,7 +166,7 @@ class VersionMatcher:
         requirements = {}
         
         for library_name, function_calls in function_calls_by_library.items():
-            print(f"🔍 Analyzing {library_name}...")
+            log.info(f"🔍 Analyzing {library_name}...")
             
             # Find compatible versions
             compatible_versions = self.find_compatible_versions(library_name, function_calls)
@@ -111,19 +175,23 @@ class VersionMatcher:
                 # Resolve to version constraint
                 version_constraint = self.resolve_version_constraints(library_name, compatible_versions)
                 requirements[library_name] = version_constraint
-                print(f"  ✅ {library_name}: {version_constraint} (from {len(compatible_versions)} compatible versions)")
+                log.info(f"  ✅ {library_name}: {version_constraint}")
             else:
-                print(f"  ❌ {library_name}: No compatible versions found")
+                log.error(f"  ❌ {library_name}: No compatible versions found")
         
         return requirements
     
     def generate_requirements_txt(self, requirements: Dict[str, str], output_path: str = "requirements.txt") -> str:
         """Generate requirements.txt file"""
-        with open(output_path, 'w') as f:
-            for library, version_constraint in requirements.items():
-                f.write(f"{library}{version_constraint}\n")
-        
-        print(f"📄 Generated requirements.txt at {output_path}")
+        # Sorted so reruns produce identical files; written to a temp file and
+        # renamed so a crash never leaves a partial requirements.txt behind
+        payload = "".join(f"{library}{version_constraint}\n" for library, version_constraint in sorted(requirements.items()))
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, output_path)
+        
+        log.info(f"📄 Generated requirements.txt at {output_path}")
         return output_path
     
     def analyze_and_generate_requirements(self, code_path: str, output_path: str = "requirements.txt") -> Dict[str, str]:
@@ -134,9 +202,9 @@ class VersionMatcher:
         analyzer = CodeAnalyzer()
         function_calls = analyzer.analyze_codebase(code_path)
         
-        print(f"📊 Found function calls for {len(function_calls)} libraries:")
+        log.info(f"📊 Found function calls for {len(function_calls)} libraries:")
         for library, calls in function_calls.items():
-            print(f"  📦 {library}: {len(calls)} functions")
+            log.info(f"  📦 {library}: {len(calls)} functions")
         
         # Match to versions
         requirements = self.match_codebase_requirements(function_calls)